@@ -6,6 +6,74 @@ class Settings(BaseSettings):
     JWT_SECRET: str
     ACCESS_TOKEN_EXPIRE_MINUTES: int
 
+    # Scraper / browser pool
+    BROWSER_POOL_SIZE: int = 4
+    BROWSER_HEALTH_CHECK_INTERVAL: int = 30  # seconds
+    NAVIGATION_TIMEOUT_MS: int = 15000
+    BROWSER_CONTEXT_MAX_NAVIGATIONS: int = 100  # a pool slot gets a fresh context after this many leases
+    BROWSER_MAX_NAVIGATIONS: int = 2000  # Chromium is restarted after this many leases; 0 disables
+    BROWSER_MAX_RSS_MB: int = 1536  # Chromium is restarted above this much memory (needs psutil); 0 disables
+    BROWSER_PAGE_HARD_TIMEOUT: int = 90  # seconds a page may stay leased before it is force-closed
+    BROWSER_DRAIN_TIMEOUT: int = 30  # seconds a restart waits for in-flight pages
+    CRAWL_CONCURRENCY: int = 4  # pages in flight per crawl
+    CRAWL_MAX_DEPTH: int = 10  # link hops from the start URL
+    CRAWL_QUEUE_FACTOR: int = 4  # candidate URLs queued per page of budget
+    CRAWL_DEDUP_MAX_DISTANCE: int = 6  # SimHash bits two pages may differ by and still be duplicates; -1 disables
+    CRAWL_DEDUP_MIN_WORDS: int = 50  # pages with less text are never treated as duplicates
+    TEXT_STREAM_THRESHOLD: int = 1_000_000  # pages larger than this (chars) are parsed without a tree
+    TEXT_MAX_INPUT_CHARS: int = 20_000_000  # streaming parse ignores HTML past this point
+    TEXT_MAX_OUTPUT_CHARS: int = 1_000_000  # extracted text is cut off here
+    RENDER_PROFILE: str = "no-media"  # default render profile: dom-only (also blocks trackers) | no-media | full
+    ANALYSIS_WORKERS: int = 2  # processes for parsing/detection/formatting; 0 runs it inline
+    ANALYSIS_MAX_PENDING: int = 32  # pages queued for analysis before scrapers wait
+
+    # robots.txt / sitemaps
+    ROBOTS_ENABLED: bool = True  # skip pages robots.txt disallows and honour crawl-delay
+    ROBOTS_USER_AGENT: str = "ScrapperBot"  # token matched against User-agent lines
+    ROBOTS_CACHE_TTL: int = 3600  # seconds a host's robots.txt is reused
+    ROBOTS_CACHE_MAX_HOSTS: int = 1024
+    ROBOTS_MAX_CRAWL_DELAY: float = 10.0  # longer crawl-delays are clamped to this (seconds)
+    SITEMAP_MAX_FILES: int = 20  # sitemaps (including index children) fetched per crawl
+    SITEMAP_MAX_URLS: int = 50_000  # sitemap entries considered per crawl
+
+    # Per-host politeness (applies to every page request)
+    POLITENESS_BACKEND: str = "local"  # local (per process) | mongo (shared by all API and worker processes)
+    POLITENESS_LEASE_SECONDS: int = 120  # an unreleased in-flight slot is reclaimed after this
+    HOST_RATE: float = 2.0  # requests per second per host
+    HOST_BURST: int = 4  # requests a quiet host may receive back to back
+    HOST_MAX_IN_FLIGHT: int = 2  # concurrent requests per host
+    HOST_MAX_RETRIES: int = 2  # retries after 429/503
+    HOST_BACKOFF_BASE: float = 1.0  # seconds; doubles per consecutive 429/503 without Retry-After
+    HOST_BACKOFF_MAX: float = 60.0  # cap on any single wait, Retry-After included
+
+    # Static (HTTP-only) fetch mode
+    HTTP_TIMEOUT: float = 15.0  # seconds
+    HTTP_MAX_CONNECTIONS: int = 100
+    STATIC_MIN_TEXT_CHARS: int = 200  # less text than this is treated as a client-rendered shell
+
+    # Scrape result cache
+    CACHE_MAX_ENTRIES: int = 512  # in-process LRU tier
+    CACHE_MAX_BYTES: int = 128 * 1024 * 1024
+    CACHE_STALE_RETENTION: int = 7 * 24 * 3600  # keep expired entries this long for revalidation
+
+    # Batch scraping (shared by every /api/scrapper/batch request in the process)
+    BATCH_CONCURRENCY: int = 8  # URLs scraped at once across all batches
+    BATCH_PER_DOMAIN_CONCURRENCY: int = 2  # URLs scraped at once against a single host
+
+    # Metrics
+    METRICS_ENABLED: bool = True  # /metrics endpoint and Server-Timing response headers
+
+    # Profiling (admin-only, see /admin/profiling)
+    PROFILING_TOKEN: str = ""  # requests with a matching X-Profile header are profiled; empty disables
+    PROFILING_SAMPLE_INTERVAL_MS: float = 5.0  # sampling profiler interval
+    SLOW_CALLBACK_THRESHOLD_MS: float = 0  # log event-loop callbacks slower than this from startup; 0 disables
+
+    # Async crawl jobs / scrape workers
+    JOB_LEASE_SECONDS: int = 60  # a job is re-leased if its worker misses heartbeats this long
+    JOB_MAX_ATTEMPTS: int = 3
+    WORKER_CONCURRENCY: int = 2  # jobs run in parallel per worker process
+    WORKER_POLL_INTERVAL: float = 1.0  # seconds between polls when the queue is empty
+
     class Config:
         env_file = ".env"
 
@@ -1,10 +1,21 @@
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo.errors import PyMongoError
 from .config import settings
+from .metrics import MongoCommandTimer
 
-client = AsyncIOMotorClient(settings.MONGO_URI)
+client = AsyncIOMotorClient(settings.MONGO_URI, event_listeners=[MongoCommandTimer()])
 db = client[settings.DATABASE_NAME]
 
 async def create_indexes():
     # create unique index for username and secret_token
     await db.users.create_index("username", unique=True)
     await db.users.create_index("secret_token", unique=True, sparse=True)
+    # expired scrape cache entries are purged by Mongo once past their revalidation window
+    await db.scrape_cache.create_index("purge_at", expireAfterSeconds=0)
+    # one stored fingerprint per user and canonical page URL, for incremental recrawls
+    await db.page_fingerprints.create_index([("user_id", 1), ("url", 1)], unique=True)
+    # one usage document per user, so the quota upsert can't create duplicates
+    try:
+        await db.usage.create_index("user_id", unique=True)
+    except PyMongoError as e:
+        print(f"Warning: could not create unique index on usage.user_id (duplicate usage documents?): {str(e)}")
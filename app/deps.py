@@ -20,3 +20,8 @@ async def get_current_user(token: str = Depends(oauth2_scheme)):
     # convert _id to str
     user["id"] = str(user["_id"])
     return user
+
+async def get_admin_user(user=Depends(get_current_user)):
+    if not user.get("is_admin"):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin access required")
+    return user
@@ -3,20 +3,25 @@ from fastapi import FastAPI, Depends, HTTPException, Query, BackgroundTasks
 from .database import db, create_indexes
 from .config import settings
 from .auth import hash_password, create_access_token
-from .routes import auth as auth_router_module, api as api_router_module, usage
+from .routes import auth as auth_router_module, api as api_router_module, usage, jobs as jobs_router_module
+from .routes import metrics as metrics_router_module, admin as admin_router_module
+from . import metrics
 from .deps import get_current_user
 from .schemas import GenerateSecretOut, UserOut
 from datetime import date
 import secrets
 from bson import ObjectId
 from datetime import datetime
-import sys
-import asyncio
 from fastapi import Request
 from datetime import datetime
 import time
 from .database import db
 from fastapi.middleware.cors import CORSMiddleware
+from .profiling import profiler, slow_callbacks
+from .scrapperUtils.analysis import analysis_pool
+from .scrapperUtils.browser_pool import browser_pool
+from .scrapperUtils.http_client import close_http_client
+from .scrapperUtils.jobs import create_job_indexes
 
 from fastapi.responses import FileResponse
 import os
@@ -24,15 +29,15 @@ import logging
 
 
 
-if sys.platform == "win32" and sys.version_info >= (3, 8):
-    asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
-
 app = FastAPI(title="FastAPI Mongo API - Usage limits")
 
 # include routers
 app.include_router(auth_router_module.router)
 app.include_router(api_router_module.router)
 app.include_router(usage.router)
+app.include_router(jobs_router_module.router)
+app.include_router(metrics_router_module.router)
+app.include_router(admin_router_module.router)
 
 app.add_middleware(
     CORSMiddleware,
@@ -47,8 +52,25 @@ app.add_middleware(
 
 @app.on_event("startup")
 async def startup_event():
+    # Before anything else starts threads; see analysis._mp_context
+    analysis_pool.start()
     # ensure indexes
     await create_indexes()
+    await create_job_indexes()
+    if settings.SLOW_CALLBACK_THRESHOLD_MS > 0:
+        slow_callbacks.enable(settings.SLOW_CALLBACK_THRESHOLD_MS)
+    # launch the shared Chromium once instead of per request
+    try:
+        await browser_pool.start()
+    except Exception as e:
+        logging.warning(f"Browser pool failed to start, will retry on first scrape: {str(e)}")
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await browser_pool.stop()
+    await close_http_client()
+    analysis_pool.stop()
 
 
 @app.middleware("http")
@@ -78,6 +100,37 @@ async def log_api_usage(request: Request, call_next):
     return response
 
 
+# Added after log_api_usage so it wraps it and its Mongo round-trips are counted
+@app.middleware("http")
+async def server_timing(request: Request, call_next):
+    if not settings.METRICS_ENABLED:
+        return await call_next(request)
+    start = time.perf_counter()
+    with metrics.collect() as timings:
+        response = await call_next(request)
+    elapsed = time.perf_counter() - start
+
+    route = request.scope.get("route")
+    metrics.HTTP_REQUEST_SECONDS.observe(
+        elapsed,
+        method=request.method,
+        route=getattr(route, "path", "unmatched"),
+        status=str(response.status_code),
+    )
+    # Streamed responses send headers first, so only stages before that appear
+    response.headers["Server-Timing"] = timings.server_timing(total=elapsed)
+    return response
+
+
+# Outermost, so a profile covers the whole request path
+@app.middleware("http")
+async def profile_requests(request: Request, call_next):
+    if not profiler.wants(request.url.path, request.headers.get("x-profile")):
+        return await call_next(request)
+    async with profiler.profile():
+        return await call_next(request)
+
+
 # @app.get("/auth/me", response_model=UserOut)
 @app.post("/auth/generate-secret", response_model=GenerateSecretOut)
 async def generate_secret(current_user=Depends(get_current_user)):
@@ -0,0 +1,283 @@
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from pymongo import monitoring
+
+# Seconds; covers a cached hit up to a slow full render
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Tuple[str, ...], values: LabelValues, extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+# --------------------------
+# Metric types
+# --------------------------
+#
+# A small subset of the Prometheus client, so /metrics needs no extra
+# dependency. Values live in this process; with several uvicorn workers
+# each one exports its own series.
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.label_names = labels
+        self._lock = threading.Lock()  # Mongo listeners report from driver threads
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        return tuple(str(labels.get(n, "")) for n in self.label_names)
+
+    def samples(self) -> Iterator[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self.samples())
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = ()):
+        super().__init__(name, help, labels)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def samples(self) -> Iterator[str]:
+        with self._lock:
+            values = list(self._values.items())
+        for key, value in values:
+            yield f"{self.name}{_labels(self.label_names, key)} {_number(value)}"
+
+
+class Gauge(_Metric):
+    """A value that is set, or read from ``fn`` at scrape time."""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, fn: Optional[Callable[[], float]] = None):
+        super().__init__(name, help)
+        self.fn = fn
+        self.value = 0.0
+
+    def set(self, value: float):
+        self.value = value
+
+    def samples(self) -> Iterator[str]:
+        value = self.value
+        if self.fn is not None:
+            try:
+                value = self.fn()
+            except Exception as e:
+                print(f"Warning: gauge {self.name} failed: {str(e)}")
+                return
+        yield f"{self.name} {_number(value)}"
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = (), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [per-bucket counts..., +Inf count, sum]
+        self._series: Dict[LabelValues, List[float]] = {}
+
+    def observe(self, seconds: float, **labels: str):
+        key = self._key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    series[i] += 1
+                    break
+            else:
+                series[len(self.buckets)] += 1
+            series[-1] += seconds
+
+    def samples(self) -> Iterator[str]:
+        with self._lock:
+            series = [(key, list(values)) for key, values in self._series.items()]
+        for key, values in series:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), values):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else _number(bound)
+                labels = _labels(self.label_names, key, 'le="%s"' % le)
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            yield f"{self.name}_sum{_labels(self.label_names, key)} {values[-1]!r}"
+            yield f"{self.name}_count{_labels(self.label_names, key)} {cumulative}"
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)."""
+        return "\n".join(metric.render() for metric in self._metrics.values()) + "\n"
+
+
+registry = Registry()
+
+
+def counter(name: str, help: str, labels: Tuple[str, ...] = ()) -> Counter:
+    return registry.register(Counter(name, help, labels))
+
+
+def gauge(name: str, help: str, fn: Optional[Callable[[], float]] = None) -> Gauge:
+    return registry.register(Gauge(name, help, fn))
+
+
+def histogram(name: str, help: str, labels: Tuple[str, ...] = (), buckets=DEFAULT_BUCKETS) -> Histogram:
+    return registry.register(Histogram(name, help, labels, buckets))
+
+
+STAGE_SECONDS = histogram(
+    "scrapper_stage_seconds", "Time spent in each stage of a scrape (stages may nest)", ("stage",),
+)
+HTTP_REQUEST_SECONDS = histogram(
+    "scrapper_http_request_seconds", "API request latency", ("method", "route", "status"),
+)
+MONGO_COMMAND_SECONDS = histogram(
+    "scrapper_mongo_command_seconds", "MongoDB command round-trip time", ("command",),
+)
+MONGO_COMMAND_FAILURES = counter(
+    "scrapper_mongo_command_failures_total", "MongoDB commands that returned an error", ("command",),
+)
+
+
+# --------------------------
+# Per-request stage timings
+# --------------------------
+
+
+class StageTimings:
+    """Stage totals for one request, reported back in its Server-Timing header."""
+
+    def __init__(self, observe: bool = True):
+        # False when the histograms are fed elsewhere (see ``collect``)
+        self.observe = observe
+        self._totals: Dict[str, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def add(self, name: str, seconds: float, count: int = 1):
+        with self._lock:
+            total = self._totals.setdefault(name, [0.0, 0])
+            total[0] += seconds
+            total[1] += count
+
+    def items(self) -> List[Tuple[str, float, int]]:
+        with self._lock:
+            return [(name, total[0], total[1]) for name, total in self._totals.items()]
+
+    def server_timing(self, total: Optional[float] = None) -> str:
+        parts = []
+        for name, seconds, count in self.items():
+            desc = f';desc="{count}x"' if count > 1 else ""
+            parts.append(f"{name};dur={seconds * 1000:.1f}{desc}")
+        if total is not None:
+            parts.append(f"total;dur={total * 1000:.1f}")
+        return ", ".join(parts)
+
+
+_timings: ContextVar[Optional[StageTimings]] = ContextVar("stage_timings", default=None)
+
+
+@contextmanager
+def collect(observe: bool = True) -> Iterator[StageTimings]:
+    """
+    Collect the stages run inside this block (and the tasks it starts).
+    ``observe=False`` keeps them out of the histograms; the analysis pool uses
+    it so work done in a worker process is recorded once, by the parent.
+    """
+    timings = StageTimings(observe)
+    token = _timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _timings.reset(token)
+
+
+def record(name: str, seconds: float, count: int = 1):
+    timings = _timings.get()
+    if timings is None or timings.observe:
+        STAGE_SECONDS.observe(seconds, stage=name)
+    if timings is not None:
+        timings.add(name, seconds, count)
+
+
+def merge(stages: List[Tuple[str, float, int]]):
+    """Record stages measured somewhere else, e.g. ``StageTimings.items()`` from a worker process."""
+    for name, seconds, count in stages:
+        record(name, seconds, count)
+
+
+@contextmanager
+def stage(name: str):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, time.perf_counter() - start)
+
+
+# --------------------------
+# MongoDB command timing
+# --------------------------
+
+
+class MongoCommandTimer(monitoring.CommandListener):
+    """
+    Times every command the driver sends. Motor runs commands in its thread
+    pool with the caller's context, so a request's Mongo time still lands in
+    its Server-Timing header.
+    """
+
+    def started(self, event):
+        pass
+
+    def _done(self, event, seconds: float):
+        MONGO_COMMAND_SECONDS.observe(seconds, command=event.command_name)
+        timings = _timings.get()
+        if timings is not None:
+            timings.add("mongo", seconds)
+
+    def succeeded(self, event):
+        self._done(event, event.duration_micros / 1e6)
+
+    def failed(self, event):
+        MONGO_COMMAND_FAILURES.inc(command=event.command_name)
+        self._done(event, event.duration_micros / 1e6)
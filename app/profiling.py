@@ -0,0 +1,366 @@
+import asyncio
+import cProfile
+import io
+import marshal
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter, deque
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import Deque, Dict, List, Optional
+
+from .config import settings
+
+
+# --------------------------
+# Request profiler
+# --------------------------
+
+
+class _Sampler:
+    """
+    Statistical profiler: a thread that records the event loop thread's stack
+    every ``interval`` seconds. Much cheaper than cProfile under load, and the
+    collapsed stacks feed straight into flamegraph.pl / speedscope.
+    """
+
+    def __init__(self, thread_id: int, interval: float, stacks: Counter):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = stacks
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profiling-sampler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({code.co_filename}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+
+
+class RequestProfiler:
+    """
+    Profiles the event loop while selected requests are in flight: the next
+    ``remaining`` requests once armed, and any request whose X-Profile header
+    matches PROFILING_TOKEN.
+
+    Profiling is per thread, not per task, so concurrent requests (and
+    background work on the loop) are included in the same profile; results
+    accumulate until the next ``arm``. Work in the analysis worker processes
+    is not covered.
+    """
+
+    def __init__(self):
+        self.mode = "cprofile"
+        self.remaining = 0
+        self.profiled = 0
+        self.started_at: Optional[datetime] = None
+        self._active = 0
+        self._profile: Optional[cProfile.Profile] = None
+        self._stats: Optional[pstats.Stats] = None
+        self._stacks: Counter = Counter()
+        self._sampler: Optional[_Sampler] = None
+        self.interval = settings.PROFILING_SAMPLE_INTERVAL_MS / 1000
+
+    def arm(self, requests: int, mode: str = "cprofile", interval_ms: Optional[float] = None):
+        """Profile the next ``requests`` requests, discarding earlier results."""
+        if self._active:
+            raise RuntimeError("Profiling is in progress; stop it first")
+        self.mode = mode
+        self.remaining = requests
+        self.profiled = 0
+        self.started_at = datetime.utcnow()
+        self._stats = None
+        self._stacks = Counter()
+        if interval_ms is not None:
+            self.interval = interval_ms / 1000
+
+    def disarm(self):
+        self.remaining = 0
+
+    def wants(self, path: str, header: Optional[str]) -> bool:
+        if path.startswith("/admin/"):
+            return False
+        if header and settings.PROFILING_TOKEN and header == settings.PROFILING_TOKEN:
+            return True
+        return self.remaining > 0
+
+    @asynccontextmanager
+    async def profile(self):
+        if self.remaining > 0:
+            self.remaining -= 1
+        if self._active == 0:
+            self._start()
+        self._active += 1
+        try:
+            yield
+        finally:
+            self._active -= 1
+            self.profiled += 1
+            if self._active == 0:
+                self._stop()
+
+    def _start(self):
+        if self.mode == "sampling":
+            self._sampler = _Sampler(threading.get_ident(), self.interval, self._stacks)
+            self._sampler.start()
+        else:
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+
+    def _stop(self):
+        if self._sampler is not None:
+            self._sampler.stop()
+            self._sampler = None
+        if self._profile is not None:
+            self._profile.disable()
+            # Merge into what earlier requests collected
+            if self._stats is None:
+                self._stats = pstats.Stats(self._profile)
+            else:
+                self._stats.add(self._profile)
+            self._profile = None
+
+    def status(self) -> Dict:
+        return {
+            "mode": self.mode,
+            "remaining": self.remaining,
+            "profiled_requests": self.profiled,
+            "in_flight": self._active,
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "samples": sum(self._stacks.values()),
+            "header_enabled": bool(settings.PROFILING_TOKEN),
+        }
+
+    def pstats_text(self, sort: str = "cumulative", limit: int = 50) -> str:
+        if self._stats is None:
+            return ""
+        out = io.StringIO()
+        self._stats.stream = out
+        self._stats.sort_stats(sort).print_stats(limit)
+        return out.getvalue()
+
+    def pstats_dump(self) -> bytes:
+        """The raw stats in ``pstats`` file format (load with pstats.Stats or snakeviz)."""
+        if self._stats is None:
+            return b""
+        return marshal.dumps(self._stats.stats)
+
+    def collapsed(self) -> str:
+        """Sampled stacks in collapsed (``frame;frame;frame count``) format."""
+        return "\n".join(f"{stack} {count}" for stack, count in self._stacks.most_common())
+
+
+profiler = RequestProfiler()
+
+
+# --------------------------
+# Memory snapshots
+# --------------------------
+
+
+class MemoryTracker:
+    """Named tracemalloc snapshots, so growth between two points can be compared."""
+
+    MAX_SNAPSHOTS = 10
+
+    def __init__(self):
+        self._snapshots: Dict[str, tracemalloc.Snapshot] = {}
+
+    def start(self, frames: int = 10):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+
+    def stop(self):
+        tracemalloc.stop()
+        self._snapshots.clear()
+
+    def snapshot(self) -> str:
+        if not tracemalloc.is_tracing():
+            raise RuntimeError("tracemalloc is not running")
+        snapshot = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        ))
+        name = datetime.utcnow().strftime("%Y%m%dT%H%M%S.%f")
+        self._snapshots[name] = snapshot
+        while len(self._snapshots) > self.MAX_SNAPSHOTS:
+            del self._snapshots[next(iter(self._snapshots))]
+        return name
+
+    def status(self) -> Dict:
+        current, peak = tracemalloc.get_traced_memory() if tracemalloc.is_tracing() else (0, 0)
+        return {
+            "tracing": tracemalloc.is_tracing(),
+            "traced_mb": round(current / 1e6, 1),
+            "peak_mb": round(peak / 1e6, 1),
+            "snapshots": list(self._snapshots),
+        }
+
+    def _get(self, name: str) -> tracemalloc.Snapshot:
+        snapshot = self._snapshots.get(name)
+        if snapshot is None:
+            raise KeyError(name)
+        return snapshot
+
+    def top(self, name: str, key_type: str = "lineno", limit: int = 25) -> List[Dict]:
+        return [
+            {"location": str(stat.traceback), "size_kb": round(stat.size / 1024, 1), "count": stat.count}
+            for stat in self._get(name).statistics(key_type)[:limit]
+        ]
+
+    def diff(self, old: str, new: str, key_type: str = "lineno", limit: int = 25) -> List[Dict]:
+        stats = self._get(new).compare_to(self._get(old), key_type)
+        return [
+            {
+                "location": str(stat.traceback),
+                "size_kb": round(stat.size / 1024, 1),
+                "size_diff_kb": round(stat.size_diff / 1024, 1),
+                "count_diff": stat.count_diff,
+            }
+            for stat in stats[:limit]
+        ]
+
+
+memory_tracker = MemoryTracker()
+
+
+# --------------------------
+# Slow callback detector
+# --------------------------
+
+
+class SlowCallbackDetector:
+    """
+    Times every callback the event loop runs (asyncio.Handle._run, which
+    every task step goes through) and records those that block the loop
+    longer than ``threshold`` seconds, e.g. a sync HTTP call in a handler.
+    Unlike loop debug mode it adds no other overhead.
+
+    uvloop runs its handles in C, so patching Handle._run sees nothing
+    there; on such loops a heartbeat task measures how late the loop wakes
+    it instead. That catches the same stalls but cannot name the callback.
+    """
+
+    MAX_RECORDED = 200
+
+    def __init__(self):
+        self.threshold = 0.0
+        self.mode: Optional[str] = None  # "handles" | "heartbeat" while enabled
+        self.recent: Deque[Dict] = deque(maxlen=self.MAX_RECORDED)
+        self._original_run = None
+        self._heartbeat: Optional[asyncio.Task] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode is not None
+
+    def enable(self, threshold_ms: float):
+        """Must be called from the event loop that is to be watched."""
+        self.threshold = threshold_ms / 1000
+        if self.enabled:
+            return
+        if isinstance(asyncio.get_running_loop(), asyncio.BaseEventLoop):
+            self._patch_handles()
+            self.mode = "handles"
+        else:
+            self._heartbeat = asyncio.create_task(self._watch_lag(), name="slow-callback-heartbeat")
+            self.mode = "heartbeat"
+
+    def disable(self):
+        if self._original_run is not None:
+            asyncio.events.Handle._run = self._original_run
+            self._original_run = None
+        if self._heartbeat is not None:
+            self._heartbeat.cancel()
+            self._heartbeat = None
+        self.mode = None
+
+    def _patch_handles(self):
+        original = self._original_run = asyncio.events.Handle._run
+        detector = self
+
+        def _run(handle):
+            start = time.perf_counter()
+            try:
+                return original(handle)
+            finally:
+                elapsed = time.perf_counter() - start
+                if elapsed >= detector.threshold:
+                    detector._record(handle, elapsed)
+
+        asyncio.events.Handle._run = _run
+
+    async def _watch_lag(self):
+        while True:
+            interval = min(max(self.threshold / 2, 0.01), 1.0)
+            start = time.perf_counter()
+            await asyncio.sleep(interval)
+            lag = time.perf_counter() - start - interval
+            if lag >= self.threshold:
+                self._record(None, lag)
+
+    def _record(self, handle, elapsed: float):
+        # Runs inside the loop's own callback machinery: never let it raise
+        try:
+            description = _describe_handle(handle) if handle is not None else "unknown (event loop lag)"
+            self.recent.append({
+                "at": datetime.utcnow().isoformat(),
+                "duration_ms": round(elapsed * 1000, 1),
+                "callback": description,
+            })
+            print(f"Warning: event loop blocked for {elapsed * 1000:.0f} ms by {description}")
+        except Exception as e:
+            print(f"Warning: slow callback detector failed: {str(e)}")
+
+    def status(self) -> Dict:
+        return {
+            "enabled": self.enabled,
+            "mode": self.mode,
+            "threshold_ms": self.threshold * 1000,
+            "recorded": len(self.recent),
+        }
+
+
+def _qualname(code) -> str:
+    # co_qualname is 3.11+
+    return getattr(code, "co_qualname", code.co_name)
+
+
+def _describe_handle(handle) -> str:
+    callback = getattr(handle, "_callback", None)
+    # Task steps are bound methods of the task; name the coroutine instead
+    task = getattr(callback, "__self__", None)
+    if not isinstance(task, asyncio.Task):
+        return repr(handle)
+    coro = task.get_coro()
+    code = getattr(coro, "cr_code", None)
+    if code is None:
+        return f"task {task.get_name()}: {coro!r}"
+    description = f"task {task.get_name()}: {_qualname(code)} ({code.co_filename}:{code.co_firstlineno})"
+    # The blocking code usually sits just before the await the task is parked on now
+    inner = coro
+    while getattr(inner, "cr_await", None) is not None and getattr(inner.cr_await, "cr_frame", None) is not None:
+        inner = inner.cr_await
+    if inner is not coro and inner.cr_frame is not None:
+        frame = inner.cr_frame
+        description += f", now awaiting in {_qualname(frame.f_code)} ({frame.f_code.co_filename}:{frame.f_lineno})"
+    return description
+
+
+slow_callbacks = SlowCallbackDetector()
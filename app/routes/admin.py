@@ -0,0 +1,123 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import PlainTextResponse, Response
+from typing import Literal, Optional
+
+from ..deps import get_admin_user
+from ..profiling import memory_tracker, profiler, slow_callbacks
+from ..schemas import ProfileStartIn, SlowCallbacksIn
+
+router = APIRouter(prefix="/admin/profiling", tags=["admin"], dependencies=[Depends(get_admin_user)])
+
+
+@router.get("")
+async def profiling_status():
+    return {
+        "profiler": profiler.status(),
+        "memory": memory_tracker.status(),
+        "slow_callbacks": slow_callbacks.status(),
+    }
+
+
+# --------------------------
+# CPU profiles
+# --------------------------
+
+
+@router.post("/start")
+async def start_profiling(data: ProfileStartIn):
+    """Profile the next ``requests`` requests (admin requests excluded)."""
+    try:
+        profiler.arm(data.requests, data.mode, data.interval_ms)
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return profiler.status()
+
+
+@router.post("/stop")
+async def stop_profiling():
+    profiler.disarm()
+    return profiler.status()
+
+
+@router.get("/report")
+async def profiling_report(
+    format: Literal["pstats", "prof", "collapsed"] = Query("pstats"),
+    sort: Literal["cumulative", "tottime", "calls"] = Query("cumulative"),
+    limit: int = Query(50, ge=1, le=1000),
+):
+    """
+    ``pstats``: readable top functions (cProfile mode). ``prof``: the raw
+    pstats file for snakeviz/gprof2dot. ``collapsed``: sampled stacks for
+    flamegraph.pl or speedscope (sampling mode).
+    """
+    if format == "prof":
+        return Response(
+            profiler.pstats_dump(),
+            media_type="application/octet-stream",
+            headers={"Content-Disposition": 'attachment; filename="scrapper.prof"'},
+        )
+    if format == "collapsed":
+        return PlainTextResponse(profiler.collapsed())
+    return PlainTextResponse(profiler.pstats_text(sort, limit))
+
+
+# --------------------------
+# Memory
+# --------------------------
+
+
+@router.post("/memory/start")
+async def start_memory_tracing(frames: int = Query(10, ge=1, le=100)):
+    memory_tracker.start(frames)
+    return memory_tracker.status()
+
+
+@router.post("/memory/stop")
+async def stop_memory_tracing():
+    memory_tracker.stop()
+    return memory_tracker.status()
+
+
+@router.post("/memory/snapshot")
+async def take_memory_snapshot(limit: int = Query(25, ge=1, le=500)):
+    try:
+        name = memory_tracker.snapshot()
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return {"snapshot": name, "top": memory_tracker.top(name, limit=limit)}
+
+
+@router.get("/memory/diff")
+async def diff_memory_snapshots(
+    old: str = Query(..., description="Earlier snapshot name"),
+    new: Optional[str] = Query(None, description="Later snapshot name; a new snapshot is taken if omitted"),
+    key_type: Literal["lineno", "filename", "traceback"] = Query("lineno"),
+    limit: int = Query(25, ge=1, le=500),
+):
+    try:
+        if new is None:
+            new = memory_tracker.snapshot()
+        return {"old": old, "new": new, "diff": memory_tracker.diff(old, new, key_type, limit)}
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=f"Unknown snapshot {e.args[0]}")
+
+
+# --------------------------
+# Event loop stalls
+# --------------------------
+
+
+@router.post("/slow-callbacks")
+async def configure_slow_callbacks(data: SlowCallbacksIn):
+    if data.enabled:
+        slow_callbacks.enable(data.threshold_ms)
+    else:
+        slow_callbacks.disable()
+    return slow_callbacks.status()
+
+
+@router.get("/slow-callbacks")
+async def list_slow_callbacks(limit: int = Query(50, ge=1, le=200)):
+    return {**slow_callbacks.status(), "recent": list(slow_callbacks.recent)[-limit:][::-1]}
@@ -1,102 +1,197 @@
 from fastapi import APIRouter, Header, HTTPException, Query
+from typing import Literal, Optional
 from ..database import db
 from datetime import date, datetime, timedelta, timezone
 from bson import ObjectId
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
 from playwright.async_api import async_playwright
-from ..utils.scraper import format_json_output, format_text_output, format_markdown_output, scrape_multiple_pages
+from fastapi.responses import StreamingResponse
+from ..utils.scraper import (
+    format_json_output, format_markdown_output,
+    iter_markdown_output, iter_text_output, iter_scrape_pages, normalize_url, render_reports, scrape_with_cache,
+    count_duplicates, summarize_changes,
+)
+from ..schemas import BatchScrapeIn
+from .. import metrics
+from ..scrapperUtils.analysis import analysis_pool
+from ..scrapperUtils.batch import iter_batch
+import json
 
 router = APIRouter(prefix="/api", tags=["api"])
 
 PLANS = {0: 10, 1: 20, 2: 30}
+# plan_id -> seconds a cached scrape is served before it is revalidated
+CACHE_TTLS = {0: 6 * 3600, 1: 3600, 2: 900}
 
-async def _reset_usage_if_needed(usage_doc):
-    today = date.today()
+def _usage_reset_stages(today: date) -> list:
+    """
+    Update-pipeline stages that apply the daily and monthly resets: the daily
+    counter restarts on a new day, the monthly one once 30+ days have passed
+    since its last reset. Dates are ISO strings, so they compare as strings.
+    Missing fields (new or old documents) start from zero / today.
+    """
+    today_str = today.isoformat()
+    month_cutoff = (today - timedelta(days=30)).isoformat()
+    return [
+        {"$set": {
+            "calls_made_month": {"$ifNull": ["$calls_made_month", 0]},
+            "calls_today": {"$ifNull": ["$calls_today", 0]},
+            "last_day_reset": {"$ifNull": ["$last_day_reset", today_str]},
+            "last_month_reset": {"$ifNull": ["$last_month_reset", today_str]},
+        }},
+        {"$set": {
+            "calls_made_month": {"$cond": [{"$lte": ["$last_month_reset", month_cutoff]}, 0, "$calls_made_month"]},
+            "last_month_reset": {"$cond": [{"$lte": ["$last_month_reset", month_cutoff]}, today_str, "$last_month_reset"]},
+            "calls_today": {"$cond": [{"$ne": ["$last_day_reset", today_str]}, 0, "$calls_today"]},
+            "last_day_reset": today_str,
+        }},
+    ]
 
-    # Separate reset fields
-    last_day_reset_str = usage_doc.get("last_day_reset")
-    last_month_reset_str = usage_doc.get("last_month_reset")
 
-    try:
-        last_day_reset = datetime.fromisoformat(last_day_reset_str).date()
-    except Exception:
-        last_day_reset = today
+async def _get_api_user(api_key: Optional[str]):
+    if not api_key:
+        raise HTTPException(status_code=401, detail="x-api-key header required")
+
+    user = await db.users.find_one({"secret_token": api_key})
+    if not user:
+        raise HTTPException(status_code=401, detail="Invalid API key")
+    return user
+
 
+async def _consume_quota(user, units: int = 1):
+    """
+    Charge ``units`` calls against the user's monthly plan limit, or raise 403.
+    Returns the updated usage document and the plan limit.
+
+    Resets, the limit check and the increment happen in one atomic
+    find_one_and_update, so concurrent calls can't overshoot the limit.
+    ``units=0`` only applies the resets (used by the dashboard).
+    """
+    plan_limit = PLANS.get(user.get("plan", 0), 10)
+    # Written to the document only when this charge is granted
+    grant_id = ObjectId()
+    granted = {"$lte": [{"$add": ["$calls_made_month", units]}, plan_limit]}
+    pipeline = _usage_reset_stages(date.today()) + [
+        {"$set": {
+            "calls_made_month": {"$cond": [granted, {"$add": ["$calls_made_month", units]}, "$calls_made_month"]},
+            "calls_today": {"$cond": [granted, {"$add": ["$calls_today", units]}, "$calls_today"]},
+            "last_grant": {"$cond": [granted, grant_id, "$last_grant"]},
+        }},
+    ]
     try:
-        last_month_reset = datetime.fromisoformat(last_month_reset_str).date()
-    except Exception:
-        last_month_reset = today
+        usage = await db.usage.find_one_and_update(
+            {"user_id": user["_id"]}, pipeline, upsert=True, return_document=ReturnDocument.AFTER,
+        )
+    except DuplicateKeyError:
+        # Two first-ever calls raced to create the document; it exists now
+        usage = await db.usage.find_one_and_update(
+            {"user_id": user["_id"]}, pipeline, return_document=ReturnDocument.AFTER,
+        )
+
+    if units and usage.get("last_grant") != grant_id:
+        raise HTTPException(status_code=403, detail="Monthly API limit exceeded for your plan")
+    return usage, plan_limit
+
+
+STREAM_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "sse": "text/event-stream"}
+
+
+def _stream_event(kind: str, payload: dict, stream: str) -> str:
+    if stream == "sse":
+        return f"event: {kind}\ndata: {json.dumps(payload, ensure_ascii=False)}\n\n"
+    return json.dumps({"event": kind, **payload}, ensure_ascii=False) + "\n"
+
+
+def _page_payload(result: dict) -> dict:
+    payload = {
+        "url": result.get("url"),
+        "title": result.get("title"),
+        "served_by": result.get("served_by"),
+        "detected_tech": result.get("detected_tech", []),
+        "content": result.get("content", ""),
+    }
+    # Recrawl change info and near-duplicate markers, when present
+    for key in ("change", "diff", "duplicate_of"):
+        if key in result:
+            payload[key] = result[key]
+    return payload
 
-    updated = False
 
-    # Reset monthly if 30+ days passed
-    if (today - last_month_reset).days >= 30:
-        usage_doc["calls_made_month"] = 0
-        usage_doc["last_month_reset"] = today.isoformat()
-        updated = True
+async def _stream_pages(url: str, stream: str, meta: dict, **options):
+    """Emit each page as soon as it is scraped; nothing is kept once sent."""
+    yield _stream_event("meta", meta, stream)
+    pages = duplicates = 0
+    async for index, result in iter_scrape_pages(url, **options):
+        pages += 1
+        duplicates += bool(result.get("duplicate_of"))
+        slim = {k: v for k, v in result.items() if k != "raw_html"}
+        with metrics.stage("format"):
+            markdown = await analysis_pool.run(format_markdown_output, [slim])
+        yield _stream_event("page", {
+            "index": index,
+            **_page_payload(result),
+            "markdown": markdown,
+        }, stream)
+    yield _stream_event("done", {"pages": pages, "duplicates_suppressed": duplicates}, stream)
 
-    # Reset daily if new day
-    if last_day_reset != today:
-        usage_doc["calls_today"] = 0
-        usage_doc["last_day_reset"] = today.isoformat()
-        updated = True
 
-    return usage_doc, updated
+# --------------------------
+# On-demand output formats
+# --------------------------
+
+
+def _json_string_chunks(chunks):
+    # Each chunk is escaped on its own, so the whole string never exists in memory at once
+    yield '"'
+    for chunk in chunks:
+        yield json.dumps(chunk, ensure_ascii=False)[1:-1]
+    yield '"'
+
+
+def _json_array_chunks(items):
+    yield "["
+    for i, item in enumerate(items):
+        yield ("," if i else "") + json.dumps(item, ensure_ascii=False)
+    yield "]"
+
+
+FORMAT_RENDERERS = {
+    "markdown": lambda results: _json_string_chunks(iter_markdown_output(results)),
+    "text": lambda results: _json_string_chunks(iter_text_output(results)),
+    "json": lambda results: _json_array_chunks(_page_payload(r) for r in results),
+    "raw": lambda results: _json_array_chunks({"url": r.get("url"), "raw_html": r.get("raw_html", "")} for r in results),
+}
+
+
+def _render_response(meta: dict, output_format: str, results):
+    """Serialize ``{**meta, "result": <rendered>}`` piece by piece."""
+    yield json.dumps(meta, ensure_ascii=False)[:-1] + ', "result": '
+    yield from FORMAT_RENDERERS[output_format](results)
+    yield "}"
 
 
 @router.get("/scrapper")
 async def use_api(
     X_Api_Key: str = Header(None),
     url: str = Query(..., min_length=1, description="Target URL to scrape"),
+    mode: Literal["browser", "static"] = Query("browser", description="'static' tries a plain HTTP fetch before rendering"),
+    render: bool = Query(False, description="Force a full browser render"),
+    profile: Optional[Literal["dom-only", "no-media", "full"]] = Query(None, description="Resources the browser may load"),
+    cache: bool = Query(True, description="Allow a cached result"),
+    max_pages: int = Query(1, ge=1, le=50, description="Same-site pages to crawl"),
+    sitemap: bool = Query(False, description="Pick pages from the site's sitemap before following links"),
+    recrawl: bool = Query(False, description="Compare with your previous crawl; unchanged pages are skipped"),
+    stream: Optional[Literal["ndjson", "sse"]] = Query(None, description="Stream pages as they are scraped"),
+    format: Optional[Literal["markdown", "text", "json", "raw"]] = Query(None, description="Render only this output format"),
 ):
-    if not X_Api_Key:
-        raise HTTPException(status_code=401, detail="x-api-key header required")
-
-    user = await db.users.find_one({"secret_token": X_Api_Key})
-    if not user:
-        raise HTTPException(status_code=401, detail="Invalid API key")
-
-    usage = await db.usage.find_one({"user_id": user["_id"]})
-    if not usage:
-        usage = {
-            "user_id": user["_id"],
-            "calls_made_month": 0,
-            "calls_today": 0,
-            "last_day_reset": date.today().isoformat(),
-            "last_month_reset": date.today().isoformat(),
-        }
-        await db.usage.insert_one(usage)
-    # else:
-    #     # Add missing fields for backward compatibility
-    #     if "last_day_reset" not in usage:
-    #         usage["last_day_reset"] = date.today().isoformat()
-    #     if "last_month_reset" not in usage:
-    #         usage["last_month_reset"] = date.today().isoformat()
-    usage, changed = await _reset_usage_if_needed(usage)
-    if changed:
-        if usage.get("_id"):
-            await db.usage.update_one({"_id": usage["_id"]}, {"$set": usage})
-        else:
-            await db.usage.update_one({"user_id": user["_id"]}, {"$set": usage})
-
+    user = await _get_api_user(X_Api_Key)
+    # One unit per page the crawl may scrape, as batch charges one per URL;
+    # cached and streamed results cost the same
+    usage, plan_limit = await _consume_quota(user, max_pages)
     plan = user.get("plan", 0)
-    plan_limit = PLANS.get(plan, 10)
-
-    if usage["calls_made_month"] >= plan_limit:
-        raise HTTPException(status_code=403, detail="Monthly API limit exceeded for your plan")
-
-    new_calls_made = usage["calls_made_month"] + 1
-    new_calls_today = usage["calls_today"] + 1
-    await db.usage.update_one(
-        {"user_id": user["_id"]},
-        {
-            "$set": {
-                "calls_made_month": new_calls_made,
-                "calls_today": new_calls_today,
-                "last_day_reset": usage["last_day_reset"],
-                "last_month_reset": usage["last_month_reset"],
-            }
-        },
-    )
+    new_calls_made = usage["calls_made_month"]
+    new_calls_today = usage["calls_today"]
 
     # Save API call log
     await db.calls.insert_one({
@@ -105,12 +200,36 @@ async def use_api(
         "time": date.today().isoformat()
     })
 
-    results = await scrape_multiple_pages(url, max_pages=1)
+    scrape_options = {
+        "max_pages": max_pages,
+        "mode": "browser" if render else mode,
+        "profile": profile,
+        "use_sitemap": sitemap,
+    }
+    if recrawl:
+        scrape_options["recrawl_user_id"] = user["_id"]
+
+    if stream:
+        # Streams bypass the cache: it needs the whole crawl before it can store it
+        meta = {
+            "url": url,
+            "calls_today": new_calls_today,
+            "calls_made_month": new_calls_made,
+            "plan_limit": plan_limit,
+        }
+        return StreamingResponse(
+            _stream_pages(url, stream, meta, **scrape_options),
+            media_type=STREAM_MEDIA_TYPES[stream],
+        )
+
+    # A recrawl is a comparison with the live site, so it never reads the cache
+    ttl = CACHE_TTLS.get(plan, CACHE_TTLS[0]) if cache and not recrawl else 0
+    results, cache_status = await scrape_with_cache(url, ttl, **scrape_options)
 
     if not results or results[0].get('url') is None:
         raise HTTPException(status_code=500, detail="Scraping failed to retrieve URL information or URL key is missing in the result.")
 
-    return {
+    meta = {
         "message": "API call successful",
         "url": url,
         "calls_today": new_calls_today,
@@ -118,7 +237,92 @@ async def use_api(
         "plan_limit": plan_limit,
         "last_day_reset": usage["last_day_reset"],
         "last_month_reset": usage["last_month_reset"],
-        "result1": format_json_output(format_markdown_output(results)),
-        "result2": format_text_output(results),
-        "result3": format_markdown_output(results)
+        "served_by": results[0].get("served_by"),
+        "cache": cache_status,
+        "duplicates_suppressed": count_duplicates(results),
+    }
+    if recrawl:
+        meta["changes"] = summarize_changes(results)
+
+    if format:
+        # Only the requested renderer runs, and its output is written out incrementally
+        return StreamingResponse(_render_response(meta, format, results), media_type="application/json")
+
+    # Formatting is CPU work too; keep it off the event loop (raw_html isn't needed for it)
+    slim = [{k: v for k, v in r.items() if k != "raw_html"} for r in results]
+    with metrics.stage("format"):
+        markdown, text = await analysis_pool.run(render_reports, slim)
+    return {
+        **meta,
+        "result1": format_json_output(markdown),
+        "result2": text,
+        "result3": markdown
+    }
+
+
+# --------------------------
+# Batch scraping
+# --------------------------
+
+
+async def _batch_item(url: str, ttl: int, options: dict) -> dict:
+    results, cache_status = await scrape_with_cache(url, ttl, max_pages=1, **options)
+    result = results[0] if results else None
+    if result is None or "Error" in result.get("detected_tech", []):
+        return {"url": url, "status": "error", "error": result.get("content") if result else "No result"}
+    return {**_page_payload(result), "status": "ok", "cache": cache_status}
+
+
+async def _stream_batch(urls, stream: str, meta: dict, fetch):
+    yield _stream_event("meta", meta, stream)
+    errors = 0
+    async for index, outcome in iter_batch(urls, fetch):
+        errors += outcome["status"] == "error"
+        yield _stream_event("result", {"index": index, **outcome}, stream)
+    yield _stream_event("done", {"count": len(urls), "errors": errors}, stream)
+
+
+@router.post("/scrapper/batch")
+async def batch_scrape(data: BatchScrapeIn, X_Api_Key: str = Header(None)):
+    """
+    Scrape many URLs (one page each) in one call. Quota is charged once for
+    every distinct URL up front; a URL that fails gets ``status: "error"``
+    without affecting the rest. ``index`` refers to the de-duplicated list.
+    """
+    user = await _get_api_user(X_Api_Key)
+    urls = list(dict.fromkeys(normalize_url(u) for u in data.urls if u.strip()))
+    if not urls:
+        raise HTTPException(status_code=422, detail="No URLs given")
+    usage, plan_limit = await _consume_quota(user, len(urls))
+
+    today = date.today().isoformat()
+    await db.calls.insert_many([{"user_id": user["_id"], "url": u, "time": today} for u in urls])
+
+    ttl = CACHE_TTLS.get(user.get("plan", 0), CACHE_TTLS[0]) if data.cache else 0
+    options = {"mode": data.mode, "profile": data.profile}
+
+    async def fetch(url: str) -> dict:
+        return await _batch_item(url, ttl, options)
+
+    meta = {
+        "count": len(urls),
+        "calls_today": usage["calls_today"],
+        "calls_made_month": usage["calls_made_month"],
+        "plan_limit": plan_limit,
+    }
+
+    if data.stream:
+        return StreamingResponse(
+            _stream_batch(urls, data.stream, meta, fetch),
+            media_type=STREAM_MEDIA_TYPES[data.stream],
+        )
+
+    results = [None] * len(urls)
+    async for index, outcome in iter_batch(urls, fetch):
+        results[index] = {"index": index, **outcome}
+    return {
+        "message": "API call successful",
+        **meta,
+        "errors": sum(r["status"] == "error" for r in results),
+        "results": results,
     }
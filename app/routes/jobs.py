@@ -0,0 +1,70 @@
+from fastapi import APIRouter, Header, HTTPException
+from bson import ObjectId
+from bson.errors import InvalidId
+from ..schemas import JobIn, JobOut
+from ..scrapperUtils.jobs import enqueue_job, get_job, get_job_results
+from .api import _consume_quota, _get_api_user
+from ..utils.scraper import normalize_url
+
+router = APIRouter(prefix="/api/jobs", tags=["jobs"])
+
+
+def _job_out(job) -> dict:
+    return {
+        "job_id": str(job["_id"]),
+        "status": job["status"],
+        "url": job["url"],
+        "pages": job.get("pages", 0),
+        "duplicates_suppressed": job.get("duplicates_suppressed", 0),
+        "attempts": job.get("attempts", 0),
+        "error": job.get("error"),
+        "created_at": job["created_at"],
+        "updated_at": job["updated_at"],
+    }
+
+
+async def _find_job(job_id: str, user):
+    try:
+        oid = ObjectId(job_id)
+    except InvalidId:
+        raise HTTPException(status_code=404, detail="Job not found")
+    job = await get_job(oid, user["_id"])
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+@router.post("", response_model=JobOut, status_code=202)
+async def submit_job(data: JobIn, X_Api_Key: str = Header(None)):
+    """
+    Queue a crawl for the scrape workers (``python -m app.worker``) and return
+    immediately. Poll ``GET /api/jobs/{job_id}`` for progress. Quota is
+    charged up front, one unit per page the job may scrape.
+    """
+    user = await _get_api_user(X_Api_Key)
+    await _consume_quota(user, data.max_pages)
+
+    options = {
+        "max_pages": data.max_pages,
+        "mode": data.mode,
+        "profile": data.profile,
+        "use_sitemap": data.use_sitemap,
+        "recrawl": data.recrawl,
+    }
+    job_id = await enqueue_job(user["_id"], normalize_url(data.url), options)
+    return _job_out(await get_job(job_id, user["_id"]))
+
+
+@router.get("/{job_id}", response_model=JobOut)
+async def job_status(job_id: str, X_Api_Key: str = Header(None)):
+    user = await _get_api_user(X_Api_Key)
+    return _job_out(await _find_job(job_id, user))
+
+
+@router.get("/{job_id}/results")
+async def job_results(job_id: str, X_Api_Key: str = Header(None)):
+    user = await _get_api_user(X_Api_Key)
+    job = await _find_job(job_id, user)
+    if job["status"] != "done":
+        raise HTTPException(status_code=409, detail=f"Job is {job['status']}")
+    return {**_job_out(job), "results": await get_job_results(job["_id"])}
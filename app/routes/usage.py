@@ -2,7 +2,7 @@ from fastapi import APIRouter, Depends, HTTPException
 from ..database import db
 from ..deps import get_current_user   # import the user dependency
 from datetime import date, timedelta, datetime
-from ..routes.api import _reset_usage_if_needed  # reuse same reset function
+from ..routes.api import _consume_quota  # same atomic reset as the API
 
 from fastapi.responses import FileResponse
 from fastapi import FastAPI, Depends, HTTPException, Query, BackgroundTasks
@@ -12,38 +12,15 @@ from ..utils.datascraper import PlacesResponse, get_places, normalize_type
 
 router = APIRouter(prefix="/usage", tags=["usage"])
 
-PLANS = {0: 10, 1: 20, 2: 30}
-
-
 @router.get("/dashboard")
 async def get_dashboard(user=Depends(get_current_user)):
     """
     Enhanced Dashboard showing API usage stats & analytics for the authenticated user.
     """
 
-    # Fetch usage
-    usage = await db.usage.find_one({"user_id": user["_id"]})
-    if not usage:
-        usage = {
-            "user_id": user["_id"],
-            "calls_made_month": 0,
-            "calls_today": 0,
-            "last_day_reset": date.today().isoformat(),
-            "last_month_reset": date.today().isoformat(),
-        }
-        await db.usage.insert_one(usage)
-
-    # Reset usage if needed (daily or monthly)
-    usage, changed = await _reset_usage_if_needed(usage)
-    if changed:
-        if usage.get("_id"):
-            await db.usage.update_one({"_id": usage["_id"]}, {"$set": usage})
-        else:
-            await db.usage.update_one({"user_id": user["_id"]}, {"$set": usage})
-
-    # Get plan info
+    # Fetch usage, with any daily/monthly reset applied
+    usage, plan_limit = await _consume_quota(user, units=0)
     plan = user.get("plan", 0)
-    plan_limit = PLANS.get(plan, 10)
 
     # --- Daily usage stats from logs (db.calls collection) ---
     today = date.today()
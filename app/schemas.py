@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import List, Literal, Optional
 from datetime import datetime
 
 class RegisterIn(BaseModel):
@@ -41,4 +41,42 @@ class ApiUsage(BaseModel):
     method: str
     timestamp: datetime
     success: bool
-    response_time_ms: Optional[int] = None
\ No newline at end of file
+    response_time_ms: Optional[int] = None
+
+# Async crawl jobs
+class JobIn(BaseModel):
+    url: str = Field(..., min_length=1)
+    max_pages: int = Field(10, ge=1, le=500)
+    mode: Literal["browser", "static"] = "browser"
+    profile: Optional[Literal["dom-only", "no-media", "full"]] = None
+    use_sitemap: bool = False
+    recrawl: bool = False
+
+class JobOut(BaseModel):
+    job_id: str
+    status: str
+    url: str
+    pages: int = 0
+    duplicates_suppressed: int = 0
+    attempts: int = 0
+    error: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
+
+# Batch scraping
+class BatchScrapeIn(BaseModel):
+    urls: List[str] = Field(..., min_length=1, max_length=500)
+    mode: Literal["browser", "static"] = "browser"
+    profile: Optional[Literal["dom-only", "no-media", "full"]] = None
+    cache: bool = True
+    stream: Optional[Literal["ndjson", "sse"]] = None
+
+# Admin profiling
+class ProfileStartIn(BaseModel):
+    requests: int = Field(10, ge=1, le=10_000)
+    mode: Literal["cprofile", "sampling"] = "cprofile"
+    interval_ms: Optional[float] = Field(None, ge=0.5, le=1000)
+
+class SlowCallbacksIn(BaseModel):
+    enabled: bool = True
+    threshold_ms: float = Field(100, ge=1)
@@ -0,0 +1,111 @@
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+from typing import Callable, Optional, TypeVar
+
+from .. import metrics
+from ..config import settings
+
+T = TypeVar("T")
+
+
+# --------------------------
+# CPU-bound analysis stage
+# --------------------------
+
+
+def _mp_context():
+    """
+    Workers must not be forked from this process: by the time they start it
+    runs Motor's executor threads, anyio's thread pool and the Playwright
+    driver connection, and a child forked while one of them holds a lock can
+    deadlock. A fork server is exec'd fresh and forks the workers from there;
+    where it isn't available (Windows, macOS default) they are spawned.
+    """
+    if "forkserver" not in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("spawn")
+    context = multiprocessing.get_context("forkserver")
+    # Import the parser once in the fork server rather than in every worker
+    context.set_forkserver_preload(["app.utils.scraper"])
+    return context
+
+
+
+class AnalysisPool:
+    """
+    Runs CPU-heavy work (HTML parsing, tech detection, formatting) in worker
+    processes so it never stalls the event loop that also serves
+    /auth and /usage.
+
+    At most ``max_pending`` jobs are queued or running at once; further
+    callers wait, which keeps memory bounded when browsers produce pages
+    faster than they can be parsed. With ``workers=0`` work runs inline.
+    """
+
+    def __init__(self, workers: int, max_pending: int):
+        self.workers = workers
+        self.max_pending = max(1, max_pending)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._restart_lock: Optional[asyncio.Lock] = None
+        self._generation = 0  # bumped on every restart after a broken pool
+        self._pending = 0
+
+    def start(self):
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_pending)
+            self._restart_lock = asyncio.Lock()
+        if self.workers > 0 and self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=_mp_context())
+
+    def stop(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def stats(self):
+        return {
+            "workers": self.workers,
+            "max_pending": self.max_pending,
+            "pending": self._pending,
+            "restarts": self._generation,
+        }
+
+    async def _restart(self, generation: int):
+        """Replace the pool that broke during ``generation``, unless another caller already did."""
+        async with self._restart_lock:
+            if self._generation != generation:
+                return
+            # A worker died (OOM on a giant page, segfault in a parser); start fresh
+            print("Warning: analysis process pool broke, restarting it")
+            self.stop()
+            self.start()
+            self._generation += 1
+
+    async def run(self, fn: Callable[..., T], *args) -> T:
+        """Run ``fn(*args)``; ``fn`` and its arguments must be picklable."""
+        self.start()
+        self._pending += 1
+        try:
+            async with self._slots:
+                if self._executor is None:
+                    return fn(*args)
+                loop = asyncio.get_running_loop()
+                # Every job in flight on a broken pool fails together; each
+                # retries once on the replacement, which only one of them starts
+                for attempt in range(2):
+                    generation = self._generation
+                    try:
+                        return await loop.run_in_executor(self._executor, partial(fn, *args))
+                    except BrokenProcessPool:
+                        if attempt:
+                            raise
+                        await self._restart(generation)
+        finally:
+            self._pending -= 1
+
+analysis_pool = AnalysisPool(settings.ANALYSIS_WORKERS, settings.ANALYSIS_MAX_PENDING)
+
+metrics.gauge("scrapper_analysis_pending", "Analysis jobs queued or running", lambda: analysis_pool.stats()["pending"])
@@ -0,0 +1,99 @@
+import asyncio
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+from ..config import settings
+
+
+# url -> per-URL outcome dict
+BatchFetchFn = Callable[[str], Awaitable[Dict]]
+
+
+# --------------------------
+# Shared scraping capacity
+# --------------------------
+
+
+class DomainLimiter:
+    """
+    Caps scrapes across every batch in the process: at most ``concurrency``
+    in flight overall and ``per_domain`` against any one host, so a batch of
+    500 URLs on the same site can't hammer it or starve other batches.
+
+    The per-domain slot is taken before the global one, so a URL waiting on
+    a busy host never holds capacity another host could use.
+    """
+
+    def __init__(self, concurrency: int, per_domain: int):
+        self.concurrency = max(1, concurrency)
+        self.per_domain = max(1, per_domain)
+        self._global: Optional[asyncio.Semaphore] = None
+        # host -> [semaphore, waiters]; dropped once nobody uses it
+        self._domains: Dict[str, list] = {}
+
+    @asynccontextmanager
+    async def slot(self, url: str):
+        if self._global is None:
+            self._global = asyncio.Semaphore(self.concurrency)
+        domain = urlparse(url).netloc.lower()
+        entry = self._domains.get(domain)
+        if entry is None:
+            entry = self._domains[domain] = [asyncio.Semaphore(self.per_domain), 0]
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                async with self._global:
+                    yield
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0:
+                self._domains.pop(domain, None)
+
+    def stats(self) -> Dict:
+        return {
+            "concurrency": self.concurrency,
+            "per_domain": self.per_domain,
+            "domains": {domain: entry[1] for domain, entry in self._domains.items()},
+        }
+
+
+batch_limiter = DomainLimiter(settings.BATCH_CONCURRENCY, settings.BATCH_PER_DOMAIN_CONCURRENCY)
+
+
+# --------------------------
+# Batch fan-out
+# --------------------------
+
+
+async def iter_batch(
+    urls: List[str],
+    fetch: BatchFetchFn,
+    limiter: Optional[DomainLimiter] = None,
+) -> AsyncIterator[Tuple[int, Dict]]:
+    """
+    Run ``fetch`` for every URL under ``limiter`` and yield ``(index, outcome)``
+    as each finishes. A URL that raises yields an error outcome instead of
+    failing the batch.
+    """
+    limiter = limiter or batch_limiter
+
+    async def run(url: str) -> Dict:
+        async with limiter.slot(url):
+            return await fetch(url)
+
+    tasks = {asyncio.ensure_future(run(url)): (i, url) for i, url in enumerate(urls)}
+    try:
+        while tasks:
+            done, _ = await asyncio.wait(tasks.keys(), return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                index, url = tasks.pop(task)
+                try:
+                    outcome = task.result()
+                except Exception as e:
+                    outcome = {"url": url, "status": "error", "error": str(e)}
+                yield index, outcome
+    finally:
+        # Client went away: free the slots for other batches
+        for task in tasks:
+            task.cancel()
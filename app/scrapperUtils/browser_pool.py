@@ -0,0 +1,325 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Optional, Set
+
+from playwright.async_api import Browser, BrowserContext, Page, Playwright, async_playwright
+
+from .. import metrics
+from ..config import settings
+
+try:
+    import psutil
+except ImportError:  # memory watchdog and stray-process cleanup are skipped without it
+    psutil = None
+
+
+# How often leased pages are checked against BROWSER_PAGE_HARD_TIMEOUT
+_WATCHDOG_INTERVAL = 5
+# Closing a browser/context whose renderer is wedged can itself hang
+_CLOSE_TIMEOUT = 10
+
+
+def _chromium_processes():
+    """Chromium processes started by this process (via the Playwright driver)."""
+    if psutil is None:
+        return []
+    try:
+        children = psutil.Process().children(recursive=True)
+    except psutil.Error:
+        return []
+    procs = []
+    for proc in children:
+        try:
+            if "chrom" in proc.name().lower():
+                procs.append(proc)
+        except psutil.Error:
+            pass
+    return procs
+
+
+def _rss_mb(procs) -> float:
+    total = 0
+    for proc in procs:
+        try:
+            total += proc.memory_info().rss
+        except psutil.Error:
+            pass
+    return total / (1024 * 1024)
+
+
+# --------------------------
+# Pool slot
+# --------------------------
+
+
+class _Slot:
+    """One reusable context/page pair handed out by the pool."""
+
+    def __init__(self, index: int):
+        self.index = index
+        self.browser: Optional[Browser] = None
+        self.context: Optional[BrowserContext] = None
+        self.page: Optional[Page] = None
+        self.navigations = 0  # leases served by the current context
+        self.leased_at: Optional[float] = None
+
+    def is_healthy(self, browser: Optional[Browser]) -> bool:
+        return (
+            browser is not None
+            and self.browser is browser
+            and self.page is not None
+            and not self.page.is_closed()
+        )
+
+
+# --------------------------
+# Browser pool
+# --------------------------
+
+
+class BrowserPool:
+    """
+    Keeps a single headless Chromium alive for the lifetime of the process
+    and leases reusable context/page pairs to callers, so a scrape only pays
+    for the navigation itself.
+
+    Long-running processes stay flat on memory: a context is replaced after
+    BROWSER_CONTEXT_MAX_NAVIGATIONS leases, and the whole browser is
+    recycled after BROWSER_MAX_NAVIGATIONS or once its processes exceed
+    BROWSER_MAX_RSS_MB. A recycle stops new leases, waits for in-flight
+    pages to finish (up to BROWSER_DRAIN_TIMEOUT), then swaps browsers.
+    A page leased for longer than BROWSER_PAGE_HARD_TIMEOUT is force-closed.
+    """
+
+    def __init__(self, size: int, health_check_interval: int = 30):
+        self.size = max(1, size)
+        self.health_check_interval = health_check_interval
+        self._playwright: Optional[Playwright] = None
+        self._browser: Optional[Browser] = None
+        self._slots: Optional[asyncio.Queue] = None
+        self._leased: Set[_Slot] = set()
+        self._browser_lock: Optional[asyncio.Lock] = None
+        self._accepting: Optional[asyncio.Event] = None  # cleared while a recycle drains the pool
+        self._idle: Optional[asyncio.Event] = None  # set while nothing is leased
+        self._recycle_task: Optional[asyncio.Task] = None
+        self._start_task: Optional[asyncio.Future] = None
+        self._health_task: Optional[asyncio.Task] = None
+        self._browser_navigations = 0
+        self._rss_mb = 0.0
+        self._recycles = 0
+        self._hung_pages_killed = 0
+
+    async def start(self):
+        # Safe to call from several coroutines at once; only the first one launches.
+        # A failed start is retried by the next caller.
+        if self._start_task is None or (self._start_task.done() and self._start_task.exception()):
+            self._start_task = asyncio.ensure_future(self._start())
+        await asyncio.shield(self._start_task)
+
+    async def _start(self):
+        if self._slots is None:
+            self._browser_lock = asyncio.Lock()
+            self._accepting = asyncio.Event()
+            self._accepting.set()
+            self._idle = asyncio.Event()
+            self._idle.set()
+            self._slots = asyncio.Queue()
+            for i in range(self.size):
+                self._slots.put_nowait(_Slot(i))
+
+        if self._playwright is None:
+            self._playwright = await async_playwright().start()
+        self._browser = await self._launch()
+        self._browser_navigations = 0
+        self._health_task = asyncio.create_task(self._health_loop())
+
+    async def stop(self):
+        if self._start_task is None:
+            return
+        for task in (self._health_task, self._recycle_task):
+            if task is not None:
+                task.cancel()
+        self._health_task = self._recycle_task = None
+        if self._browser is not None:
+            await self._close_browser(self._browser, _chromium_processes())
+        if self._playwright is not None:
+            await self._playwright.stop()
+        self._browser = None
+        self._playwright = None
+        self._slots = None
+        self._leased = set()
+        self._start_task = None
+
+    async def _launch(self) -> Browser:
+        return await self._playwright.chromium.launch(headless=True)
+
+    # --------------------------
+    # Health checks
+    # --------------------------
+
+    async def _ensure_browser(self) -> Browser:
+        async with self._browser_lock:
+            if self._browser is None or not self._browser.is_connected():
+                print("Warning: Chromium is not connected, relaunching")
+                self._browser = await self._launch()
+            return self._browser
+
+    async def _reset_slot(self, slot: _Slot, browser: Browser):
+        if slot.context is not None and slot.browser is browser:
+            try:
+                await slot.context.close()
+            except Exception:
+                pass
+        slot.browser = browser
+        slot.context = await browser.new_context()
+        slot.page = await slot.context.new_page()
+
+    async def _health_loop(self):
+        last_check = time.monotonic()
+        while True:
+            await asyncio.sleep(_WATCHDOG_INTERVAL)
+            try:
+                await self._kill_hung_pages()
+                if self.health_check_interval > 0 and time.monotonic() - last_check >= self.health_check_interval:
+                    last_check = time.monotonic()
+                    await self._ensure_browser()
+                    self._check_memory()
+            except Exception as e:
+                print(f"Warning: Browser health check failed: {str(e)}")
+
+    def stats(self) -> Dict[str, object]:
+        available = self._slots.qsize() if self._slots is not None else 0
+        return {
+            "size": self.size,
+            "available": available,
+            "in_use": self.size - available if self._slots is not None else 0,
+            "connected": bool(self._browser and self._browser.is_connected()),
+            "navigations": self._browser_navigations,
+            "rss_mb": round(self._rss_mb, 1),
+            "recycles": self._recycles,
+            "hung_pages_killed": self._hung_pages_killed,
+            "draining": bool(self._accepting is not None and not self._accepting.is_set()),
+        }
+
+    # --------------------------
+    # Recycling and watchdog
+    # --------------------------
+
+    def _check_memory(self):
+        if psutil is None:
+            return
+        self._rss_mb = _rss_mb(_chromium_processes())
+        if settings.BROWSER_MAX_RSS_MB > 0 and self._rss_mb > settings.BROWSER_MAX_RSS_MB:
+            self._request_recycle(f"Chromium RSS {self._rss_mb:.0f} MB over {settings.BROWSER_MAX_RSS_MB} MB")
+
+    def _request_recycle(self, reason: str):
+        if self._recycle_task is None or self._recycle_task.done():
+            print(f"Warning: Recycling Chromium: {reason}")
+            self._recycle_task = asyncio.create_task(self._recycle())
+
+    async def _recycle(self):
+        """Drain in-flight pages, then replace the browser; leases wait meanwhile."""
+        self._accepting.clear()
+        try:
+            try:
+                await asyncio.wait_for(self._idle.wait(), timeout=settings.BROWSER_DRAIN_TIMEOUT)
+            except asyncio.TimeoutError:
+                print("Warning: Browser drain timed out; closing pages still in use")
+            async with self._browser_lock:
+                old_browser, old_procs = self._browser, _chromium_processes()
+                self._browser = await self._launch()
+                self._browser_navigations = 0
+                self._recycles += 1
+            # Slots still point at the old browser, so each is rebuilt on its next lease
+            if old_browser is not None:
+                await self._close_browser(old_browser, old_procs)
+        finally:
+            self._accepting.set()
+
+    async def _close_browser(self, browser: Browser, procs):
+        try:
+            await asyncio.wait_for(browser.close(), timeout=_CLOSE_TIMEOUT)
+        except Exception as e:
+            print(f"Warning: Failed to close browser: {str(e)}")
+        # Renderers that outlived their browser would otherwise linger as zombies
+        for proc in procs:
+            try:
+                if proc.is_running():
+                    proc.kill()
+            except psutil.Error:
+                pass
+
+    async def _kill_hung_pages(self):
+        deadline = time.monotonic() - settings.BROWSER_PAGE_HARD_TIMEOUT
+        for slot in list(self._leased):
+            if slot.leased_at is None or slot.leased_at > deadline or slot.context is None:
+                continue
+            print(f"Warning: Page {slot.index} exceeded {settings.BROWSER_PAGE_HARD_TIMEOUT}s, closing it")
+            self._hung_pages_killed += 1
+            context, slot.context, slot.page = slot.context, None, None
+            slot.leased_at = None
+            try:
+                # Closing the context fails whatever the caller is awaiting on it
+                await asyncio.wait_for(context.close(), timeout=_CLOSE_TIMEOUT)
+            except Exception:
+                # The renderer won't even close: only a fresh browser gets rid of it
+                self._request_recycle("a hung page could not be closed")
+
+    # --------------------------
+    # Leasing
+    # --------------------------
+
+    @asynccontextmanager
+    async def page(self) -> AsyncIterator[Page]:
+        """Lease a page for the duration of the ``async with`` block."""
+        await self.start()
+        while True:
+            await self._accepting.wait()
+            slot: _Slot = await self._slots.get()
+            if self._accepting.is_set():
+                break
+            # A recycle started while we queued for the slot: hand it back
+            # rather than lease a page on the browser being drained
+            self._slots.put_nowait(slot)
+        self._leased.add(slot)
+        self._idle.clear()
+        try:
+            browser = await self._ensure_browser()
+            if not slot.is_healthy(browser):
+                await self._reset_slot(slot, browser)
+                slot.navigations = 0
+            slot.leased_at = time.monotonic()
+            yield slot.page
+        finally:
+            slot.leased_at = None
+            slot.navigations += 1
+            self._browser_navigations += 1
+            if slot.context is not None and slot.navigations >= settings.BROWSER_CONTEXT_MAX_NAVIGATIONS:
+                # A fresh context drops the old one's caches, storage and renderer
+                try:
+                    await asyncio.wait_for(slot.context.close(), timeout=_CLOSE_TIMEOUT)
+                except Exception:
+                    pass
+                slot.context = slot.page = None
+            elif slot.context is not None:
+                # Don't leak cookies/session state between unrelated requests.
+                try:
+                    await slot.context.clear_cookies()
+                except Exception:
+                    slot.page = None
+            self._leased.discard(slot)
+            if not self._leased:
+                self._idle.set()
+            self._slots.put_nowait(slot)
+            if settings.BROWSER_MAX_NAVIGATIONS > 0 and self._browser_navigations >= settings.BROWSER_MAX_NAVIGATIONS:
+                self._request_recycle(f"{self._browser_navigations} navigations")
+
+
+browser_pool = BrowserPool(settings.BROWSER_POOL_SIZE, settings.BROWSER_HEALTH_CHECK_INTERVAL)
+
+metrics.gauge("scrapper_browser_pool_size", "Pages the browser pool can lease", lambda: browser_pool.stats()["size"])
+metrics.gauge("scrapper_browser_pages_in_use", "Browser pages currently leased", lambda: browser_pool.stats()["in_use"])
+metrics.gauge("scrapper_browser_connected", "1 while Chromium is connected", lambda: browser_pool.stats()["connected"])
+metrics.gauge("scrapper_browser_recycles", "Chromium restarts since startup", lambda: browser_pool.stats()["recycles"])
+metrics.gauge("scrapper_browser_rss_mb", "Chromium resident memory (needs psutil)", lambda: browser_pool.stats()["rss_mb"])
@@ -0,0 +1,139 @@
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from pymongo.errors import PyMongoError
+
+from ..config import settings
+from ..database import db
+from .frontier import canonicalize_url
+
+
+# Mongo caps documents at 16 MB; leave room for the envelope.
+_MAX_PERSISTED_BYTES = 12 * 1024 * 1024
+
+
+def _entry_size(results: List[Dict]) -> int:
+    return sum(len(r.get("raw_html") or "") + len(r.get("content") or "") for r in results)
+
+
+def cache_key(url: str, options: Dict) -> str:
+    payload = canonicalize_url(url) + "|" + json.dumps(options, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+# --------------------------
+# Two-tier scrape cache
+# --------------------------
+
+
+class ScrapeCache:
+    """
+    Scrape results keyed by canonical URL + scrape options.
+
+    Tier 1 is an in-process LRU bounded by entry count and bytes; tier 2 is
+    the ``scrape_cache`` Mongo collection, shared by every API worker. Expired
+    entries are kept (until ``purge_at``) so they can be revalidated with
+    ETag/Last-Modified instead of re-scraped.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int, stale_retention: int):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.stale_retention = stale_retention
+        self._lru: "OrderedDict[str, Dict]" = OrderedDict()
+        self._lru_bytes = 0
+
+    # --------------------------
+    # In-process tier
+    # --------------------------
+
+    def _lru_get(self, key: str) -> Optional[Dict]:
+        entry = self._lru.get(key)
+        if entry is not None:
+            self._lru.move_to_end(key)
+        return entry
+
+    def _lru_put(self, entry: Dict):
+        self._lru_drop(entry["_id"])
+        if entry["size"] > self.max_bytes:
+            return
+        self._lru[entry["_id"]] = entry
+        self._lru_bytes += entry["size"]
+        while self._lru and (len(self._lru) > self.max_entries or self._lru_bytes > self.max_bytes):
+            _, evicted = self._lru.popitem(last=False)
+            self._lru_bytes -= evicted["size"]
+
+    def _lru_drop(self, key: str):
+        old = self._lru.pop(key, None)
+        if old is not None:
+            self._lru_bytes -= old["size"]
+
+    # --------------------------
+    # Public API
+    # --------------------------
+
+    async def get(self, key: str) -> Optional[Dict]:
+        """Return the entry (fresh or stale) or None. Check ``is_fresh`` before serving it."""
+        entry = self._lru_get(key)
+        if entry is not None:
+            return entry
+        try:
+            entry = await db.scrape_cache.find_one({"_id": key})
+        except PyMongoError as e:
+            print(f"Warning: scrape cache read failed: {str(e)}")
+            return None
+        if entry is not None:
+            self._lru_put(entry)
+        return entry
+
+    @staticmethod
+    def is_fresh(entry: Dict) -> bool:
+        return entry["expires_at"] > time.time()
+
+    async def put(self, key: str, url: str, results: List[Dict], ttl: int):
+        now = time.time()
+        entry = {
+            "_id": key,
+            "url": canonicalize_url(url),
+            "results": results,
+            "stored_at": now,
+            "expires_at": now + ttl,
+            "size": _entry_size(results),
+        }
+        self._lru_put(entry)
+        if entry["size"] > _MAX_PERSISTED_BYTES:
+            return
+        try:
+            await db.scrape_cache.replace_one(
+                {"_id": key},
+                {**entry, "purge_at": datetime.utcnow() + timedelta(seconds=ttl + self.stale_retention)},
+                upsert=True,
+            )
+        except PyMongoError as e:
+            print(f"Warning: scrape cache write failed: {str(e)}")
+
+    async def refresh(self, key: str, entry: Dict, ttl: int):
+        """Extend a revalidated entry's lifetime without rewriting its results."""
+        entry["expires_at"] = time.time() + ttl
+        self._lru_put(entry)
+        try:
+            await db.scrape_cache.update_one(
+                {"_id": key},
+                {"$set": {
+                    "expires_at": entry["expires_at"],
+                    "purge_at": datetime.utcnow() + timedelta(seconds=ttl + self.stale_retention),
+                }},
+            )
+        except PyMongoError as e:
+            print(f"Warning: scrape cache refresh failed: {str(e)}")
+
+
+scrape_cache = ScrapeCache(
+    settings.CACHE_MAX_ENTRIES,
+    settings.CACHE_MAX_BYTES,
+    settings.CACHE_STALE_RETENTION,
+)
@@ -0,0 +1,75 @@
+import asyncio
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from .frontier import CrawlFrontier, FrontierEntry
+
+
+# (result, hrefs found on the page)
+FetchFn = Callable[[str], Awaitable[Tuple[Dict, List[str]]]]
+# (page url, href) -> absolute in-scope url, or None to drop the link
+ResolveFn = Callable[[str, str], Optional[str]]
+
+
+# Links found on a near-duplicate page are crawled only after everything else at their depth
+DUPLICATE_LINK_PRIORITY = -1.0
+
+
+def error_result(url: str, error: Exception) -> Dict:
+    return {
+        "url": url,
+        "detected_tech": ["Error"],
+        "content": str(error),
+        "raw_html": ""
+    }
+
+
+# --------------------------
+# Concurrent crawl engine
+# --------------------------
+
+
+async def crawl(
+    frontier: CrawlFrontier,
+    fetch: FetchFn,
+    resolve: ResolveFn,
+    concurrency: int = 4,
+) -> AsyncIterator[Tuple[int, Dict]]:
+    """
+    Breadth-first crawl over ``frontier`` that keeps up to ``concurrency``
+    fetches in flight.
+
+    Yields ``(index, result)`` as pages finish; ``index`` is the crawl order
+    (the order URLs were discovered), so callers can merge results back in
+    a stable order by sorting on it.
+    """
+    in_flight: Dict[asyncio.Future, FrontierEntry] = {}
+    concurrency = max(1, concurrency)
+
+    try:
+        while len(frontier) or in_flight:
+            while len(frontier) and len(in_flight) < concurrency:
+                entry = frontier.pop()
+                in_flight[asyncio.ensure_future(fetch(entry.url))] = entry
+
+            done, _ = await asyncio.wait(in_flight.keys(), return_when=asyncio.FIRST_COMPLETED)
+
+            for task in done:
+                entry = in_flight.pop(task)
+                try:
+                    result, hrefs = task.result()
+                except Exception as e:
+                    result, hrefs = error_result(entry.url, e), []
+
+                priority = DUPLICATE_LINK_PRIORITY if result.get("duplicate_of") else 0.0
+                for href in hrefs:
+                    if frontier.full:
+                        break
+                    link = resolve(entry.url, href)
+                    if link:
+                        frontier.push(link, entry.depth + 1, priority)
+
+                yield entry.index, result
+    finally:
+        # Consumer stopped early (client disconnect, error): don't leave pages busy.
+        for task in in_flight:
+            task.cancel()
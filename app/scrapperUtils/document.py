@@ -0,0 +1,42 @@
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+try:
+    import lxml  # noqa: F401
+    HTML_PARSER = "lxml"
+except ImportError:  # BeautifulSoup's built-in parser is slower but always available
+    HTML_PARSER = "html.parser"
+
+
+# --------------------------
+# Parsed page
+# --------------------------
+
+
+@dataclass
+class ParsedDocument:
+    """
+    Everything later stages need from one scraped page, extracted from a
+    single parse so formatters never have to touch ``raw_html`` again.
+    """
+
+    url: str
+    raw_html: str
+    headers: Dict[str, str] = field(default_factory=dict)
+    title: Optional[str] = None
+    scripts: List[str] = field(default_factory=list)
+    links: List[str] = field(default_factory=list)
+    text: str = ""
+    detected_tech: List[str] = field(default_factory=list)
+
+    def to_result(self) -> Dict:
+        return {
+            "url": self.url,
+            "title": self.title,
+            "detected_tech": self.detected_tech if self.detected_tech else ["Unknown"],
+            "content": self.text,
+            "scripts": self.scripts,
+            "links": self.links,
+            "headers": self.headers,
+            "raw_html": self.raw_html
+        }
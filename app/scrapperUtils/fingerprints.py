@@ -0,0 +1,82 @@
+import difflib
+import hashlib
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from pymongo.errors import PyMongoError
+
+from ..database import db
+from .frontier import canonicalize_url
+
+
+# Stored link lists let an unchanged page keep feeding the crawl without a render
+_MAX_STORED_LINKS = 1000
+_MAX_DIFF_CHARS = 20_000
+
+
+def content_fingerprint(result: Dict) -> str:
+    """Hash of what a customer sees change: the extracted text and the tech list."""
+    h = hashlib.sha256()
+    h.update((result.get("content") or "").encode("utf-8"))
+    h.update(b"\0")
+    h.update("\n".join(sorted(result.get("detected_tech") or [])).encode("utf-8"))
+    return h.hexdigest()
+
+
+def text_diff(old: str, new: str) -> str:
+    """Unified diff of two extracted texts, cut to a readable size."""
+    diff = "\n".join(difflib.unified_diff(
+        old.splitlines(), new.splitlines(), "previous", "current", lineterm="", n=1,
+    ))
+    if len(diff) > _MAX_DIFF_CHARS:
+        diff = diff[:_MAX_DIFF_CHARS] + "\n... (diff truncated)"
+    return diff
+
+
+# --------------------------
+# Per-user fingerprint store
+# --------------------------
+
+
+async def get_fingerprint(user_id, url: str) -> Optional[Dict]:
+    try:
+        return await db.page_fingerprints.find_one({"user_id": user_id, "url": canonicalize_url(url)})
+    except PyMongoError as e:
+        print(f"Warning: fingerprint read failed: {str(e)}")
+        return None
+
+
+async def save_fingerprint(user_id, result: Dict, links: List[str], fingerprint: str):
+    """Record the page as of this crawl; only called for new or changed pages."""
+    headers = result.get("headers") or {}
+    try:
+        await db.page_fingerprints.update_one(
+            {"user_id": user_id, "url": canonicalize_url(result["url"])},
+            {"$set": {
+                "fingerprint": fingerprint,
+                "etag": headers.get("etag"),
+                "last_modified": headers.get("last-modified"),
+                "title": result.get("title"),
+                "detected_tech": result.get("detected_tech", []),
+                "content": result.get("content", ""),
+                "links": links[:_MAX_STORED_LINKS],
+                "changed_at": datetime.utcnow(),
+            }},
+            upsert=True,
+        )
+    except PyMongoError as e:
+        print(f"Warning: fingerprint write failed: {str(e)}")
+
+
+async def refresh_validators(stored: Dict, headers: Dict[str, str]):
+    """Store new ETag/Last-Modified for content that did not change."""
+    etag, last_modified = headers.get("etag"), headers.get("last-modified")
+    if etag == stored.get("etag") and last_modified == stored.get("last_modified"):
+        return
+    try:
+        await db.page_fingerprints.update_one(
+            {"_id": stored["_id"]},
+            {"$set": {"etag": etag, "last_modified": last_modified}},
+        )
+    except PyMongoError as e:
+        print(f"Warning: fingerprint write failed: {str(e)}")
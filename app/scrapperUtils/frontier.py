@@ -0,0 +1,127 @@
+import heapq
+import urllib.parse
+from typing import List, NamedTuple, Optional, Set, Tuple
+
+from ..config import settings
+
+
+# --------------------------
+# URL canonicalization
+# --------------------------
+
+
+TRACKING_PARAMS = frozenset({
+    "gclid", "dclid", "fbclid", "msclkid", "yclid", "igshid",
+    "mc_cid", "mc_eid", "_ga", "_gl", "_hsenc", "_hsmi", "ref_src",
+})
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def canonical_netloc(url: str) -> str:
+    """Lower-case ``host[:port]`` without the default port; IPv6 hosts keep their brackets."""
+    parts = urllib.parse.urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if ":" in host:
+        host = f"[{host}]"
+    if parts.port and parts.port != DEFAULT_PORTS.get(scheme):
+        return f"{host}:{parts.port}"
+    return host
+
+
+def canonicalize_url(url: str) -> str:
+    """
+    Comparison key for a URL, so trivially different spellings of the same
+    page compare equal: lower-case scheme/host, no default port, no fragment,
+    no tracking parameters, sorted query, and no trailing slash except on the
+    root. It is lossy (``/docs/`` and ``/docs`` share a key), so use it for
+    dedup and lookups only, never as the URL to fetch or report.
+    """
+    parts = urllib.parse.urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+
+    netloc = canonical_netloc(url)
+    userinfo, at, _ = parts.netloc.rpartition("@")
+    if at:
+        netloc = f"{userinfo}@{netloc}"
+
+    path = parts.path or "/"
+    if len(path) > 1 and path.endswith("/"):
+        path = path.rstrip("/") or "/"
+
+    query = [
+        (k, v) for k, v in urllib.parse.parse_qsl(parts.query, keep_blank_values=True)
+        if not k.lower().startswith("utm_") and k.lower() not in TRACKING_PARAMS
+    ]
+    query.sort()
+
+    return urllib.parse.urlunsplit((scheme, netloc, path, urllib.parse.urlencode(query), ""))
+
+
+# --------------------------
+# Crawl frontier
+# --------------------------
+
+
+class FrontierEntry(NamedTuple):
+    index: int  # crawl order (assigned when popped)
+    url: str
+    depth: int
+    priority: float = 0.0
+
+
+class CrawlFrontier:
+    """
+    Priority frontier of URLs with a page budget and a depth limit. URLs are
+    de-duplicated by ``canonicalize_url`` but queued and handed out as given.
+
+    Entries pop shallowest first, then highest ``priority``, then in the order
+    they were pushed; with every priority left at 0 that is plain
+    breadth-first order. Sitemap seeds use ``priority`` to go ahead of links
+    discovered at the same depth, and links found on near-duplicate pages
+    fall behind them.
+
+    The page budget is spent when an entry is popped, not when it is pushed,
+    so up to ``max_pages * CRAWL_QUEUE_FACTOR`` candidates can compete for it
+    and priority decides which of them are actually fetched.
+    """
+
+    def __init__(self, max_pages: int, max_depth: Optional[int] = None):
+        self.max_pages = max_pages
+        self.max_depth = max_depth
+        self.max_queued = max(1, max_pages * settings.CRAWL_QUEUE_FACTOR)
+        self.scheduled = 0  # entries popped (and so given a crawl index)
+        self._pushed = 0
+        self._heap: List[Tuple[int, float, int, str]] = []
+        # Holds only accepted pushes, so at most max_pages + max_queued keys
+        self._seen: Set[str] = set()
+
+    @property
+    def full(self) -> bool:
+        """True once further pushes would be rejected."""
+        return self.scheduled >= self.max_pages or len(self._heap) >= self.max_queued
+
+    def push(self, url: str, depth: int = 0, priority: float = 0.0) -> bool:
+        """Queue ``url``; returns False if it was a duplicate or out of budget/depth."""
+        if self.full or (self.max_depth is not None and depth > self.max_depth):
+            return False
+        key = canonicalize_url(url)
+        if key in self._seen:
+            return False
+        self._seen.add(key)
+        heapq.heappush(self._heap, (depth, -priority, self._pushed, url))
+        self._pushed += 1
+        return True
+
+    def pop(self) -> Optional[FrontierEntry]:
+        if not len(self):
+            return None
+        depth, neg_priority, _, url = heapq.heappop(self._heap)
+        entry = FrontierEntry(self.scheduled, url, depth, -neg_priority)
+        self.scheduled += 1
+        return entry
+
+    def __len__(self) -> int:
+        # Entries that can still be popped within the page budget
+        return min(len(self._heap), max(0, self.max_pages - self.scheduled))
@@ -0,0 +1,136 @@
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from bson import ObjectId
+from pymongo import ReturnDocument
+
+from ..config import settings
+from ..database import db
+
+
+# Job lifecycle: queued -> running -> done | failed
+# A running job whose lease expires (worker crashed or hung) is picked up again
+# by the next worker until it has used JOB_MAX_ATTEMPTS.
+
+
+async def create_job_indexes():
+    await db.jobs.create_index([("status", 1), ("created_at", 1)])
+    await db.jobs.create_index([("status", 1), ("lease_expires_at", 1)])
+    await db.jobs.create_index("user_id")
+    await db.job_results.create_index([("job_id", 1), ("index", 1)])
+
+
+async def enqueue_job(user_id, url: str, options: Dict) -> ObjectId:
+    now = datetime.utcnow()
+    result = await db.jobs.insert_one({
+        "user_id": user_id,
+        "url": url,
+        "options": options,
+        "status": "queued",
+        "attempts": 0,
+        "worker_id": None,
+        "lease_expires_at": None,
+        "error": None,
+        "pages": 0,
+        "created_at": now,
+        "updated_at": now,
+    })
+    return result.inserted_id
+
+
+async def lease_job(worker_id: str) -> Optional[Dict]:
+    """Atomically claim the oldest runnable job for ``worker_id``."""
+    now = datetime.utcnow()
+    return await db.jobs.find_one_and_update(
+        {
+            "$or": [
+                {"status": "queued"},
+                {"status": "running", "lease_expires_at": {"$lt": now}},
+            ],
+            "attempts": {"$lt": settings.JOB_MAX_ATTEMPTS},
+        },
+        {
+            "$set": {
+                "status": "running",
+                "worker_id": worker_id,
+                "lease_expires_at": now + timedelta(seconds=settings.JOB_LEASE_SECONDS),
+                "updated_at": now,
+            },
+            "$inc": {"attempts": 1},
+        },
+        sort=[("created_at", 1)],
+        return_document=ReturnDocument.AFTER,
+    )
+
+
+async def heartbeat(job_id: ObjectId, worker_id: str) -> bool:
+    """Extend the lease; False means another worker has taken the job over."""
+    now = datetime.utcnow()
+    result = await db.jobs.update_one(
+        {"_id": job_id, "worker_id": worker_id, "status": "running"},
+        {"$set": {
+            "lease_expires_at": now + timedelta(seconds=settings.JOB_LEASE_SECONDS),
+            "updated_at": now,
+        }},
+    )
+    return result.matched_count == 1
+
+
+async def complete_job(job_id: ObjectId, worker_id: str, results: List[Dict]) -> bool:
+    if not await heartbeat(job_id, worker_id):
+        return False  # lease lost; the worker that owns it now will write results
+    # One document per page keeps big crawls clear of Mongo's 16 MB document cap.
+    await db.job_results.delete_many({"job_id": job_id})
+    if results:
+        await db.job_results.insert_many([
+            {"job_id": job_id, "index": i, "result": {k: v for k, v in r.items() if k != "raw_html"}}
+            for i, r in enumerate(results)
+        ])
+    result = await db.jobs.update_one(
+        {"_id": job_id, "worker_id": worker_id, "status": "running"},
+        {"$set": {
+            "status": "done",
+            "pages": len(results),
+            "duplicates_suppressed": sum(1 for r in results if r.get("duplicate_of")),
+            "lease_expires_at": None,
+            "finished_at": datetime.utcnow(),
+            "updated_at": datetime.utcnow(),
+        }},
+    )
+    return result.matched_count == 1
+
+
+async def fail_job(job: Dict, worker_id: str, error: str):
+    # Out of attempts -> failed for good; otherwise back in the queue.
+    status = "failed" if job.get("attempts", 0) >= settings.JOB_MAX_ATTEMPTS else "queued"
+    await db.jobs.update_one(
+        {"_id": job["_id"], "worker_id": worker_id, "status": "running"},
+        {"$set": {
+            "status": status,
+            "error": error,
+            "lease_expires_at": None,
+            "updated_at": datetime.utcnow(),
+        }},
+    )
+
+
+async def fail_abandoned_jobs() -> int:
+    """Jobs whose last allowed attempt died with its worker are marked failed."""
+    result = await db.jobs.update_many(
+        {
+            "status": "running",
+            "lease_expires_at": {"$lt": datetime.utcnow()},
+            "attempts": {"$gte": settings.JOB_MAX_ATTEMPTS},
+        },
+        {"$set": {"status": "failed", "error": "Worker lease expired", "updated_at": datetime.utcnow()}},
+    )
+    return result.modified_count
+
+
+async def get_job(job_id: ObjectId, user_id) -> Optional[Dict]:
+    return await db.jobs.find_one({"_id": job_id, "user_id": user_id})
+
+
+async def get_job_results(job_id: ObjectId) -> List[Dict]:
+    cursor = db.job_results.find({"job_id": job_id}).sort("index", 1)
+    return [doc["result"] async for doc in cursor]
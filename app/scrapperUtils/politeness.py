@@ -0,0 +1,304 @@
+import asyncio
+import email.utils
+import time
+import urllib.parse
+import uuid
+from contextlib import asynccontextmanager
+from typing import Awaitable, Callable, Dict, Optional, Set, Tuple, TypeVar
+
+from pymongo import ReturnDocument
+from pymongo.errors import PyMongoError
+
+from ..config import settings
+from ..database import db
+from .robots import robots_store
+
+T = TypeVar("T")
+
+# Responses that mean "slow down"
+THROTTLE_STATUSES = frozenset({429, 503})
+# How often a caller re-checks a host whose connections are all busy
+_IN_FLIGHT_POLL = 0.05
+
+
+def host_of(url: str) -> str:
+    return urllib.parse.urlsplit(url).netloc.lower()
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP-date)."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, when.timestamp() - time.time())
+
+
+# --------------------------
+# Host state backends
+# --------------------------
+#
+# Each host has a GCRA rate limiter (a token bucket kept as one number: the
+# theoretical arrival time ``tat`` of the next request), a set of in-flight
+# leases, a ``blocked_until`` time set by 429/Retry-After, and a strike count
+# that grows the backoff while a host keeps throttling us.
+#
+# ``acquire`` returns (lease_id, 0) when a request may start now, otherwise
+# (None, seconds to wait before asking again).
+
+
+# How often the local backend sweeps out hosts it no longer needs
+_PRUNE_INTERVAL = 60.0
+
+
+class LocalPolitenessBackend:
+    """
+    Host state in this process only; the default. Hosts that have gone quiet
+    (no leases, no pending rate debt, no recent block) are dropped, so a
+    long-running process that contacts arbitrary domains stays bounded.
+    """
+
+    def __init__(self):
+        self._hosts: Dict[str, Dict] = {}
+        self._next_prune = 0.0
+
+    def _prune(self, now: float):
+        self._next_prune = now + _PRUNE_INTERVAL
+        # Strikes are kept while a block is recent, so repeat offenders still back off further
+        quiet_since = now - settings.HOST_BACKOFF_MAX
+        for host in [
+            host for host, state in self._hosts.items()
+            if not state["leases"] and state["tat"] <= now and state["blocked_until"] <= quiet_since
+        ]:
+            del self._hosts[host]
+
+    def _state(self, host: str) -> Dict:
+        state = self._hosts.get(host)
+        if state is None:
+            state = self._hosts[host] = {"tat": 0.0, "leases": set(), "blocked_until": 0.0, "strikes": 0}
+        return state
+
+    async def acquire(self, host: str, interval: float, burst: int, max_in_flight: int) -> Tuple[Optional[str], float]:
+        now = time.time()
+        if now >= self._next_prune:
+            self._prune(now)
+        state = self._state(host)
+        if state["blocked_until"] > now:
+            return None, state["blocked_until"] - now
+        tolerance = interval * (burst - 1)
+        if state["tat"] - now > tolerance:
+            return None, state["tat"] - tolerance - now
+        if len(state["leases"]) >= max_in_flight:
+            return None, _IN_FLIGHT_POLL
+        state["tat"] = max(state["tat"], now) + interval
+        lease_id = uuid.uuid4().hex
+        state["leases"].add(lease_id)
+        return lease_id, 0.0
+
+    async def release(self, host: str, lease_id: str):
+        self._state(host)["leases"].discard(lease_id)
+
+    async def strike(self, host: str) -> int:
+        state = self._state(host)
+        state["strikes"] += 1
+        return state["strikes"]
+
+    async def block(self, host: str, until: float):
+        state = self._state(host)
+        state["blocked_until"] = max(state["blocked_until"], until)
+
+    async def clear_strikes(self, host: str):
+        self._state(host)["strikes"] = 0
+
+
+class MongoPolitenessBackend:
+    """
+    Host state in the ``politeness`` collection (one document per host), so
+    every API and worker process shares the same limits. Each decision is a
+    single atomic find_one_and_update; leases carry an expiry so a crashed
+    process can't hold a host's connections forever.
+    """
+
+    def __init__(self, lease_seconds: int):
+        self.lease_seconds = lease_seconds
+
+    async def acquire(self, host: str, interval: float, burst: int, max_in_flight: int) -> Tuple[Optional[str], float]:
+        now = time.time()
+        lease_id = uuid.uuid4().hex
+        tolerance = interval * (burst - 1)
+        tat = {"$ifNull": ["$tat", 0]}
+        blocked_until = {"$ifNull": ["$blocked_until", 0]}
+        try:
+            state = await db.politeness.find_one_and_update(
+                {"_id": host},
+                [
+                    # Forget leases whose holder never released them
+                    {"$set": {"leases": {"$filter": {
+                        "input": {"$ifNull": ["$leases", []]},
+                        "cond": {"$gt": ["$$this.expires", now]},
+                    }}}},
+                    {"$set": {"granted": {"$and": [
+                        {"$lte": [blocked_until, now]},
+                        {"$lte": [{"$subtract": [tat, now]}, tolerance]},
+                        {"$lt": [{"$size": "$leases"}, max_in_flight]},
+                    ]}}},
+                    {"$set": {
+                        "tat": {"$cond": ["$granted", {"$add": [{"$max": [tat, now]}, interval]}, tat]},
+                        "leases": {"$cond": [
+                            "$granted",
+                            {"$concatArrays": ["$leases", [{"id": lease_id, "expires": now + self.lease_seconds}]]},
+                            "$leases",
+                        ]},
+                    }},
+                ],
+                upsert=True,
+                return_document=ReturnDocument.AFTER,
+            )
+        except PyMongoError as e:
+            # Don't stop scraping because the coordination store is down
+            print(f"Warning: politeness state unavailable for {host}: {str(e)}")
+            return lease_id, 0.0
+
+        if state.get("granted"):
+            return lease_id, 0.0
+        if state.get("blocked_until", 0) > now:
+            return None, state["blocked_until"] - now
+        if state.get("tat", 0) - now > tolerance:
+            return None, state["tat"] - tolerance - now
+        return None, _IN_FLIGHT_POLL
+
+    async def release(self, host: str, lease_id: str):
+        try:
+            await db.politeness.update_one({"_id": host}, {"$pull": {"leases": {"id": lease_id}}})
+        except PyMongoError as e:
+            print(f"Warning: politeness lease release failed for {host}: {str(e)}")
+
+    async def strike(self, host: str) -> int:
+        try:
+            state = await db.politeness.find_one_and_update(
+                {"_id": host}, {"$inc": {"strikes": 1}}, upsert=True, return_document=ReturnDocument.AFTER,
+            )
+            return state["strikes"]
+        except PyMongoError as e:
+            print(f"Warning: politeness state unavailable for {host}: {str(e)}")
+            return 1
+
+    async def block(self, host: str, until: float):
+        try:
+            await db.politeness.update_one({"_id": host}, {"$max": {"blocked_until": until}}, upsert=True)
+        except PyMongoError as e:
+            print(f"Warning: politeness state unavailable for {host}: {str(e)}")
+
+    async def clear_strikes(self, host: str):
+        try:
+            await db.politeness.update_one({"_id": host, "strikes": {"$gt": 0}}, {"$set": {"strikes": 0}})
+        except PyMongoError as e:
+            print(f"Warning: politeness state unavailable for {host}: {str(e)}")
+
+
+POLITENESS_BACKENDS = {
+    "local": LocalPolitenessBackend,
+    "mongo": lambda: MongoPolitenessBackend(settings.POLITENESS_LEASE_SECONDS),
+}
+
+
+# --------------------------
+# Scheduler
+# --------------------------
+
+
+class PolitenessScheduler:
+    """
+    Every outgoing page request goes through here. Per host it enforces a
+    request rate (HOST_RATE with HOST_BURST, slowed further by robots.txt
+    crawl-delay), at most HOST_MAX_IN_FLIGHT concurrent requests, and a
+    pause after 429/503 (Retry-After when given, otherwise exponential
+    backoff up to HOST_BACKOFF_MAX).
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+        # Hosts this process has seen throttle us, so success only costs a
+        # write when there is a strike count to clear
+        self._struck: Set[str] = set()
+
+    async def _limits(self, url: str) -> Tuple[float, int]:
+        interval = 1.0 / settings.HOST_RATE if settings.HOST_RATE > 0 else 0.0
+        burst = max(1, settings.HOST_BURST)
+        if settings.ROBOTS_ENABLED:
+            delay = (await robots_store.get(url)).crawl_delay
+            if delay > interval:
+                # crawl-delay means one request per delay, no bursts
+                interval, burst = delay, 1
+        return interval, burst
+
+    @asynccontextmanager
+    async def slot(self, url: str):
+        """Hold one of the host's request slots for the duration of a request."""
+        host = host_of(url)
+        interval, burst = await self._limits(url)
+        while True:
+            lease_id, wait = await self.backend.acquire(host, interval, burst, max(1, settings.HOST_MAX_IN_FLIGHT))
+            if lease_id is not None:
+                break
+            await asyncio.sleep(min(wait, settings.HOST_BACKOFF_MAX))
+        try:
+            yield
+        finally:
+            await self.backend.release(host, lease_id)
+
+    async def report(self, url: str, status: Optional[int], retry_after: Optional[str] = None) -> bool:
+        """
+        Record a response. Returns True when the host asked us to slow down;
+        the host is then blocked for everyone until the backoff has passed.
+        """
+        host = host_of(url)
+        if status not in THROTTLE_STATUSES:
+            if host in self._struck:
+                self._struck.discard(host)
+                await self.backend.clear_strikes(host)
+            return False
+
+        strikes = await self.backend.strike(host)
+        self._struck.add(host)
+        delay = parse_retry_after(retry_after)
+        if delay is None:
+            delay = settings.HOST_BACKOFF_BASE * 2 ** (strikes - 1)
+        await self.backend.block(host, time.time() + min(delay, settings.HOST_BACKOFF_MAX))
+        return True
+
+    async def request(
+        self,
+        url: str,
+        send: Callable[[], Awaitable[T]],
+        status_of: Callable[[T], Tuple[Optional[int], Optional[str]]],
+    ) -> T:
+        """
+        Run ``send()`` inside a slot and retry it (HOST_MAX_RETRIES times)
+        while the host answers 429/503. ``status_of`` extracts the status
+        and Retry-After header from whatever ``send`` returns.
+        """
+        attempt = 0
+        while True:
+            async with self.slot(url):
+                response = await send()
+            status, retry_after = status_of(response)
+            if not await self.report(url, status, retry_after) or attempt >= settings.HOST_MAX_RETRIES:
+                return response
+            attempt += 1
+
+
+def _make_scheduler() -> PolitenessScheduler:
+    factory = POLITENESS_BACKENDS.get(settings.POLITENESS_BACKEND)
+    if factory is None:
+        print(f"Warning: unknown POLITENESS_BACKEND {settings.POLITENESS_BACKEND!r}, using local")
+        factory = LocalPolitenessBackend
+    return PolitenessScheduler(factory())
+
+
+politeness = _make_scheduler()
@@ -0,0 +1,108 @@
+import urllib.parse
+from dataclasses import dataclass
+from typing import Callable, FrozenSet, Optional
+
+from playwright.async_api import Page, Route
+
+
+# Hosts we never need in order to read the DOM. Subdomains match too.
+TRACKER_DOMAINS = frozenset({
+    "google-analytics.com",
+    "googletagmanager.com",
+    "googleadservices.com",
+    "googlesyndication.com",
+    "doubleclick.net",
+    "connect.facebook.net",
+    "hotjar.com",
+    "mixpanel.com",
+    "segment.io",
+    "segment.com",
+    "amplitude.com",
+    "clarity.ms",
+    "bat.bing.com",
+    "ads-twitter.com",
+    "analytics.tiktok.com",
+    "scorecardresearch.com",
+    "quantserve.com",
+    "taboola.com",
+    "outbrain.com",
+    "criteo.com",
+    "adnxs.com",
+    "newrelic.com",
+    "nr-data.net",
+    "fullstory.com",
+    "intercom.io",
+})
+
+
+def is_tracker(url: str) -> bool:
+    host = (urllib.parse.urlsplit(url).hostname or "").lower()
+    while host:
+        if host in TRACKER_DOMAINS:
+            return True
+        _, _, host = host.partition(".")
+    return False
+
+
+# --------------------------
+# Profiles
+# --------------------------
+
+
+@dataclass(frozen=True)
+class RenderProfile:
+    name: str
+    # Playwright resource types: document, stylesheet, image, media, font, script,
+    # texttrack, xhr, fetch, eventsource, websocket, manifest, other
+    blocked_resource_types: FrozenSet[str] = frozenset()
+    block_trackers: bool = False
+    wait_until: str = "load"  # passed to page.goto
+    wait_for_network_idle: bool = True
+
+    @property
+    def intercepts(self) -> bool:
+        return bool(self.blocked_resource_types) or self.block_trackers
+
+
+RENDER_PROFILES = {
+    # Just the DOM and script srcs: no styling, no media, no trackers, no idle wait.
+    "dom-only": RenderProfile(
+        name="dom-only",
+        blocked_resource_types=frozenset({"image", "media", "font", "stylesheet"}),
+        block_trackers=True,
+        wait_until="domcontentloaded",
+        wait_for_network_idle=False,
+    ),
+    # Scripts and XHR still run so client-rendered content appears. Trackers
+    # load too: tags injected through GTM are what detect_tech reports as
+    # analytics, so the default profile must not hide them.
+    "no-media": RenderProfile(
+        name="no-media",
+        blocked_resource_types=frozenset({"image", "media", "font"}),
+    ),
+    # Everything, as a real browser would load it.
+    "full": RenderProfile(name="full"),
+}
+
+
+async def apply_render_profile(page: Page, profile: RenderProfile) -> Optional[Callable]:
+    """
+    Install request interception for ``profile`` on a (pooled) page. Returns the
+    handler so the caller can ``page.unroute`` it before handing the page back.
+    """
+    if not profile.intercepts:
+        return None
+
+    async def handler(route: Route):
+        request = route.request
+        if request.is_navigation_request():
+            await route.continue_()
+        elif request.resource_type in profile.blocked_resource_types or (
+            profile.block_trackers and is_tracker(request.url)
+        ):
+            await route.abort()
+        else:
+            await route.continue_()
+
+    await page.route("**/*", handler)
+    return handler
@@ -0,0 +1,160 @@
+import asyncio
+import time
+import urllib.parse
+import urllib.robotparser
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+
+from ..config import settings
+from .http_client import get_http_client
+
+
+# Google stops reading robots.txt after 500 KiB; so do we.
+_MAX_ROBOTS_BYTES = 500 * 1024
+# Unreachable robots.txt is retried sooner than a real one is refreshed
+_ERROR_TTL = 300
+
+
+def origin_of(url: str) -> str:
+    parts = urllib.parse.urlsplit(url)
+    return f"{parts.scheme.lower()}://{parts.netloc.lower()}"
+
+
+def _parse_crawl_delay(lines: List[str], agent: str) -> Optional[float]:
+    """
+    Crawl-delay for ``agent`` (falling back to ``*``). robotparser drops
+    non-integer values such as ``Crawl-delay: 0.5``, so it is read here.
+    """
+    agent = agent.lower()
+    delays: Dict[str, float] = {}
+    group: List[str] = []
+    in_agents = False
+    for line in lines:
+        key, _, value = line.split("#", 1)[0].partition(":")
+        key, value = key.strip().lower(), value.strip()
+        if key == "user-agent":
+            if not in_agents:
+                group = []
+            group.append(value.lower())
+            in_agents = True
+        elif key:
+            in_agents = False
+            if key == "crawl-delay":
+                try:
+                    for name in group:
+                        delays.setdefault(name, float(value))
+                except ValueError:
+                    pass
+    for name, delay in delays.items():
+        if name != "*" and name in agent:
+            return delay
+    return delays.get("*")
+
+
+# --------------------------
+# Parsed rules for one host
+# --------------------------
+
+
+class RobotsRules:
+    """robots.txt for one origin: allow/deny checks, crawl-delay and sitemaps."""
+
+    def __init__(self, origin: str, lines: Optional[List[str]] = None, disallow_all: bool = False):
+        self.origin = origin
+        self._parser = urllib.robotparser.RobotFileParser()
+        self._crawl_delay: Optional[float] = None
+        if disallow_all:
+            self._parser.disallow_all = True
+        else:
+            self._parser.parse(lines or [])
+            self._crawl_delay = _parse_crawl_delay(lines or [], settings.ROBOTS_USER_AGENT)
+
+    def allowed(self, url: str) -> bool:
+        return self._parser.can_fetch(settings.ROBOTS_USER_AGENT, url)
+
+    @property
+    def crawl_delay(self) -> float:
+        delay = self._crawl_delay
+        if delay is None:
+            rate = self._parser.request_rate(settings.ROBOTS_USER_AGENT)
+            delay = rate.seconds / rate.requests if rate and rate.requests else 0
+        return min(float(delay), settings.ROBOTS_MAX_CRAWL_DELAY)
+
+    @property
+    def sitemaps(self) -> List[str]:
+        return list(self._parser.site_maps() or [])
+
+
+# --------------------------
+# Per-host TTL cache
+# --------------------------
+
+
+class RobotsStore:
+    """
+    Fetches each origin's robots.txt once and keeps it for ``ttl`` seconds.
+    Concurrent lookups for the same origin share one request.
+
+    Follows the usual conventions: 401/403 disallows everything, other 4xx
+    (no robots.txt) allows everything, and a server error or network failure
+    allows everything but is retried after a few minutes.
+    """
+
+    def __init__(self, ttl: int, max_hosts: int):
+        self.ttl = ttl
+        self.max_hosts = max_hosts
+        self._entries: "OrderedDict[str, Tuple[float, RobotsRules]]" = OrderedDict()
+        self._pending: Dict[str, asyncio.Future] = {}
+
+    async def get(self, url: str) -> RobotsRules:
+        origin = origin_of(url)
+        cached = self._entries.get(origin)
+        if cached is not None and cached[0] > time.time():
+            self._entries.move_to_end(origin)
+            return cached[1]
+
+        future = self._pending.get(origin)
+        if future is None:
+            future = self._pending[origin] = asyncio.ensure_future(self._load(origin))
+        # Shielded: one caller giving up must not cancel the fetch for the others
+        return await asyncio.shield(future)
+
+    async def _load(self, origin: str) -> RobotsRules:
+        try:
+            rules, ttl = await self._fetch(origin)
+            self._store(origin, rules, ttl)
+            return rules
+        finally:
+            self._pending.pop(origin, None)
+
+    def _store(self, origin: str, rules: RobotsRules, ttl: int):
+        self._entries[origin] = (time.time() + ttl, rules)
+        self._entries.move_to_end(origin)
+        while len(self._entries) > self.max_hosts:
+            self._entries.popitem(last=False)
+
+    async def _fetch(self, origin: str) -> Tuple[RobotsRules, int]:
+        try:
+            async with get_http_client().stream("GET", origin + "/robots.txt") as response:
+                if response.status_code in (401, 403):
+                    return RobotsRules(origin, disallow_all=True), self.ttl
+                if response.status_code >= 500:
+                    return RobotsRules(origin), _ERROR_TTL
+                if response.status_code >= 400:
+                    return RobotsRules(origin), self.ttl
+                body = bytearray()
+                async for chunk in response.aiter_bytes():
+                    body += chunk
+                    if len(body) >= _MAX_ROBOTS_BYTES:
+                        break
+        except httpx.HTTPError as e:
+            print(f"Warning: robots.txt fetch failed for {origin}: {str(e)}")
+            return RobotsRules(origin), _ERROR_TTL
+
+        text = bytes(body[:_MAX_ROBOTS_BYTES]).decode("utf-8", errors="replace")
+        return RobotsRules(origin, text.splitlines()), self.ttl
+
+
+robots_store = RobotsStore(settings.ROBOTS_CACHE_TTL, settings.ROBOTS_CACHE_MAX_HOSTS)
@@ -0,0 +1,95 @@
+import hashlib
+import re
+from typing import Dict, Generic, List, Optional, Tuple, TypeVar
+
+K = TypeVar("K")
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+_SHINGLE_SIZE = 3
+
+
+_BITS = 64
+_BYTES = _BITS // 8
+
+
+def simhash(text: str) -> int:
+    """
+    64-bit SimHash of ``text`` over overlapping word 3-grams. Pages that share
+    most of their shingles get fingerprints a few bits apart; unrelated pages
+    differ in about half their bits.
+    """
+    words = [w.lower() for w in _WORD.findall(text)]
+    if len(words) >= _SHINGLE_SIZE:
+        tokens = [" ".join(words[i:i + _SHINGLE_SIZE]) for i in range(len(words) - _SHINGLE_SIZE + 1)]
+    else:
+        tokens = words
+
+    # Repeated shingles (boilerplate) count once per occurrence, like term frequency
+    counts: Dict[str, int] = {}
+    for token in tokens:
+        counts[token] = counts.get(token, 0) + 1
+
+    # Tally hash bytes per position instead of voting bit by bit (8 updates per
+    # token rather than 64); the per-bit votes are recovered from the tallies.
+    tallies = [0] * (_BYTES * 256)
+    for token, count in counts.items():
+        digest = hashlib.blake2b(token.encode("utf-8"), digest_size=_BYTES).digest()
+        for k, byte in enumerate(digest):
+            tallies[k * 256 + byte] += count
+
+    fingerprint = 0
+    for k in range(_BYTES):
+        row = tallies[k * 256:(k + 1) * 256]
+        for i in range(8):
+            ones = sum(n for b, n in enumerate(row) if (b >> i) & 1)
+            # A bit is set when more than half of the (weighted) shingles set it
+            if 2 * ones > len(tokens):
+                fingerprint |= 1 << (k * 8 + i)
+    return fingerprint
+
+
+def word_count(text: str) -> int:
+    return sum(1 for _ in _WORD.finditer(text))
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+# --------------------------
+# Similarity index
+# --------------------------
+
+
+class SimHashIndex(Generic[K]):
+    """
+    Finds a stored fingerprint within ``max_distance`` bits of a query without
+    comparing against every page.
+
+    The fingerprint is cut into ``max_distance + 1`` bands; two fingerprints
+    that differ in at most ``max_distance`` bits must agree exactly on at
+    least one band (pigeonhole), so only pages sharing a band are compared.
+    """
+
+    def __init__(self, max_distance: int = 3):
+        self.max_distance = max_distance
+        width = -(-_BITS // (max_distance + 1))
+        self._bands: List[Tuple[int, int]] = [
+            (start, (1 << min(width, _BITS - start)) - 1) for start in range(0, _BITS, width)
+        ]
+        self._tables: List[Dict[int, List[Tuple[int, K]]]] = [{} for _ in self._bands]
+
+    def find(self, fingerprint: int) -> Optional[K]:
+        """Key of a stored near-duplicate of ``fingerprint``, or None."""
+        for (shift, mask), table in zip(self._bands, self._tables):
+            for other, key in table.get((fingerprint >> shift) & mask, ()):
+                if hamming_distance(fingerprint, other) <= self.max_distance:
+                    return key
+        return None
+
+    def add(self, fingerprint: int, key: K):
+        for (shift, mask), table in zip(self._bands, self._tables):
+            table.setdefault((fingerprint >> shift) & mask, []).append((fingerprint, key))
+
+    def __len__(self) -> int:
+        return sum(len(bucket) for bucket in self._tables[0].values()) if self._tables else 0
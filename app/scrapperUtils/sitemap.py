@@ -0,0 +1,166 @@
+import gzip
+import io
+import zlib
+from datetime import datetime, timezone
+from typing import AsyncIterator, List, NamedTuple, Optional, Tuple
+from xml.etree.ElementTree import ParseError, iterparse
+
+import httpx
+
+from ..config import settings
+from .analysis import analysis_pool
+from .http_client import get_http_client
+from .politeness import politeness
+
+
+# The sitemaps.org limit for one file, compressed or not
+_MAX_SITEMAP_BYTES = 50 * 1024 * 1024
+_DEFAULT_PRIORITY = 0.5
+
+
+class SitemapEntry(NamedTuple):
+    url: str
+    lastmod: Optional[datetime]
+    priority: float
+
+
+def _local(tag: str) -> Optional[str]:
+    """
+    "{http://www.sitemaps.org/schemas/sitemap/0.9}loc" -> "loc". Extension
+    elements (``<image:loc>``, ``<video:...>``) give None so they can't
+    shadow the page's own ``<loc>``.
+    """
+    if not tag.startswith("{"):
+        return tag
+    namespace, _, local = tag[1:].partition("}")
+    return local if "/schemas/sitemap/" in namespace else None
+
+
+def _parse_lastmod(value: Optional[str]) -> Optional[datetime]:
+    if not value:
+        return None
+    value = value.strip().replace("Z", "+00:00")
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        try:
+            parsed = datetime.strptime(value[:10], "%Y-%m-%d")
+        except ValueError:
+            return None
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def _parse_priority(value: Optional[str]) -> float:
+    try:
+        return min(1.0, max(0.0, float(value)))
+    except (TypeError, ValueError):
+        return _DEFAULT_PRIORITY
+
+
+# --------------------------
+# Parsing
+# --------------------------
+
+
+def parse_sitemap(data: bytes) -> Tuple[List[SitemapEntry], List[str]]:
+    """
+    Parse one sitemap file (gzipped or not) in a single streaming pass.
+    Returns the page entries of a ``<urlset>`` and the child sitemap URLs of
+    a ``<sitemapindex>``; elements are discarded as soon as they are read.
+    """
+    if data[:2] == b"\x1f\x8b":
+        data = _gunzip(data)
+
+    entries: List[SitemapEntry] = []
+    children: List[str] = []
+    fields = {}
+    try:
+        for event, elem in iterparse(io.BytesIO(data), events=("end",)):
+            tag = _local(elem.tag)
+            if tag in ("loc", "lastmod", "priority"):
+                fields[tag] = (elem.text or "").strip()
+            elif tag in ("url", "sitemap"):
+                loc = fields.get("loc")
+                if loc and tag == "url":
+                    entries.append(SitemapEntry(
+                        loc, _parse_lastmod(fields.get("lastmod")), _parse_priority(fields.get("priority")),
+                    ))
+                elif loc:
+                    children.append(loc)
+                fields = {}
+                elem.clear()
+            if len(entries) >= settings.SITEMAP_MAX_URLS:
+                break
+    except ParseError as e:
+        # Keep whatever was read before the broken part
+        print(f"Warning: sitemap parse error: {str(e)}")
+    return entries, children
+
+
+def _gunzip(data: bytes) -> bytes:
+    # Bounded, so a gzip bomb can't expand past the sitemap size limit
+    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    try:
+        return decompressor.decompress(data, _MAX_SITEMAP_BYTES)
+    except zlib.error as e:
+        raise gzip.BadGzipFile(str(e))
+
+
+# --------------------------
+# Fetching
+# --------------------------
+
+
+async def _download(url: str) -> Optional[bytes]:
+    try:
+        async with politeness.slot(url), get_http_client().stream("GET", url) as response:
+            if response.status_code >= 400:
+                return None
+            body = bytearray()
+            async for chunk in response.aiter_bytes():
+                body += chunk
+                if len(body) > _MAX_SITEMAP_BYTES:
+                    print(f"Warning: sitemap {url} is over the size limit; truncated")
+                    break
+    except httpx.HTTPError as e:
+        print(f"Warning: sitemap fetch failed for {url}: {str(e)}")
+        return None
+    return bytes(body)
+
+
+async def iter_sitemap_entries(sitemap_urls: List[str]) -> AsyncIterator[SitemapEntry]:
+    """
+    Walk sitemaps and sitemap indexes breadth-first, yielding page entries.
+    At most SITEMAP_MAX_FILES files are fetched and SITEMAP_MAX_URLS entries
+    yielded, however deeply the indexes nest.
+    """
+    queue = list(dict.fromkeys(sitemap_urls))
+    seen = set(queue)
+    fetched = yielded = 0
+    while queue and fetched < settings.SITEMAP_MAX_FILES:
+        url = queue.pop(0)
+        fetched += 1
+        data = await _download(url)
+        if not data:
+            continue
+        try:
+            # Up to 50 MB of XML: parse it in the analysis pool, off the event loop
+            entries, children = await analysis_pool.run(parse_sitemap, data)
+        except gzip.BadGzipFile as e:
+            print(f"Warning: sitemap {url} is not valid gzip: {str(e)}")
+            continue
+        for entry in entries:
+            yield entry
+            yielded += 1
+            if yielded >= settings.SITEMAP_MAX_URLS:
+                return
+        for child in children:
+            if child not in seen:
+                seen.add(child)
+                queue.append(child)
+
+
+def rank_entries(entries: List[SitemapEntry]) -> List[SitemapEntry]:
+    """Most relevant first: highest ``priority``, then most recently modified."""
+    oldest = datetime.min.replace(tzinfo=timezone.utc)
+    return sorted(entries, key=lambda e: (e.priority, e.lastmod or oldest), reverse=True)
@@ -0,0 +1,86 @@
+import re
+from typing import Dict, Iterable, List, Optional, Pattern, Set, Tuple
+
+try:
+    import ahocorasick
+except ImportError:  # optional C extension; plain substring scans are the fallback
+    ahocorasick = None
+
+
+_REGEX_META = re.compile(r"[\[\]().*+?{}|^$]")
+
+
+def _as_literal(pattern: str) -> Optional[str]:
+    """Return the plain lower-case string a pattern matches, or None if it is a real regex."""
+    if re.search(r"\\[A-Za-z0-9]", pattern):  # \d, \b, \s ... are classes, not escapes
+        return None
+    if _REGEX_META.search(re.sub(r"\\.", "", pattern)):
+        return None
+    return re.sub(r"\\(.)", r"\1", pattern).lower()
+
+
+def _compile_lowered(pattern: str) -> Pattern:
+    # Sources are lower-cased once, so a lower-cased pattern without IGNORECASE
+    # matches the same text and keeps re's fast literal-prefix search.
+    if re.search(r"\\[A-Z]", pattern):
+        return re.compile(pattern, re.IGNORECASE)
+    return re.compile(pattern.lower())
+
+
+# --------------------------
+# Compiled signature matcher
+# --------------------------
+
+
+class TechMatcher:
+    """
+    Signature table compiled once into:
+
+    * an Aho-Corasick automaton over every literal pattern, so each source is
+      scanned a single time for all of them, and
+    * the few genuine regexes, precompiled against lower-cased input.
+
+    ``match`` gives the same answer as running ``re.search(pattern, source,
+    re.IGNORECASE)`` for every pattern against every source.
+    """
+
+    def __init__(self, signatures: Dict[str, List[str]]):
+        self._literals: Dict[str, Set[str]] = {}
+        self._regexes: List[Tuple[str, Pattern]] = []
+
+        for tech, patterns in signatures.items():
+            for pattern in patterns:
+                literal = _as_literal(pattern)
+                if literal is not None:
+                    self._literals.setdefault(literal, set()).add(tech)
+                else:
+                    self._regexes.append((tech, _compile_lowered(pattern)))
+
+        self._automaton = None
+        if ahocorasick is not None and self._literals:
+            self._automaton = ahocorasick.Automaton()
+            for literal in self._literals:
+                self._automaton.add_word(literal, literal)
+            self._automaton.make_automaton()
+
+    def _match_literals(self, text: str) -> Set[str]:
+        if self._automaton is not None:
+            found = {literal for _, literal in self._automaton.iter(text)}
+        else:
+            found = {literal for literal in self._literals if literal in text}
+        techs: Set[str] = set()
+        for literal in found:
+            techs |= self._literals[literal]
+        return techs
+
+    def match(self, sources: Iterable[str]) -> Set[str]:
+        detected: Set[str] = set()
+        for source in sources:
+            if not source:
+                continue
+            text = source.lower()
+            detected |= self._match_literals(text)
+            for tech, regex in self._regexes:
+                if tech not in detected and regex.search(text):
+                    detected.add(tech)
+        return detected
@@ -0,0 +1,175 @@
+from dataclasses import dataclass
+from typing import Dict, List, Tuple
+
+
+# --------------------------
+# Tech detection dictionary
+# --------------------------
+
+# category -> technology -> patterns (matched case-insensitively against the
+# page HTML, script srcs and "name:value" response headers)
+TECH_CATALOG = {
+    "Frontend": {
+        "React": [r"id=['\"]root['\"]", r"react", r"react-dom"],
+        "Next.js": [r"id=['\"]__next['\"]", r"_next/static"],
+        "Vue.js": [r"vue(\.runtime)?\.js", r"_NUXT_"],
+        "Angular": [r"ng-version"],
+        "Svelte": [r"svelte"],
+        "jQuery": [r"jquery.*\.js"],
+        "Bootstrap": [r"bootstrap.\.css", r"bootstrap.\.js"],
+        "Tailwind CSS": [r"tailwind.*\.css"],
+        "Bulma": [r"bulma\.css"],
+        "Foundation": [r"foundation\.css"],
+        "Vuex": [r"vuex"],
+        "Redux": [r"redux"],
+        "Gatsby": [r"id=['\"]___gatsby['\"]"],
+        "Nuxt.js": [r"_NUXT_"],
+        "Vuetify": [r"vuetify\.min\.js"],
+        "Preact": [r"preact"], # Added Preact
+        "Lit": [r"lit-html"], # Added Lit
+        "Dojo": [r"dojo\.js"], # Added Dojo Toolkit
+    },
+    "Backend": {
+        "Express.js": [r"x-powered-by.*express"],
+        "NestJS": [r"nestjs"],
+        "Django": [r"csrftoken"],
+        "Flask": [r"flask"],
+        "Rails": [r"_rails_session", r"x-runtime"],
+        "Laravel": [r"laravel_session", r"x-powered-by.*php"],
+        "ASP.NET": [r"ASP\.NET", r"aspnet"],
+        "Spring Boot": [r"jsessionid"],
+        "Node.js": [r"x-powered-by.*nodejs"],
+        "Go": [r"go version"],
+        "Ruby": [r"ruby version"],
+        "PHP": [r"x-powered-by.*php"],
+        "Python": [r"python version", r"server: python"], # Added Python server detection
+        "Java": [r"java version", r"server: java"], # Added Java server detection
+        "C#": [r"c# version", r"server: c#"], # Added C# server detection
+        "Kotlin": [r"kotlin"], # Added Kotlin
+        "Rust": [r"rustc version"], # Added Rust
+        "Scala": [r"scala version"], # Added Scala
+    },
+    "Databases": {
+        "MongoDB": [r"ObjectId", r"_id"],
+        "PostgreSQL": [r"PG::", r"postgres"],
+        "MySQL": [r"MySQL"],
+        "Firebase": [r"firebaseio\.com", r"firestore"],
+        "Supabase": [r"supabase\.co"],
+        "Redis": [r"redis"],
+        "Elasticsearch": [r"elasticsearch"],
+        "SQLite": [r"sqlite"], # Added SQLite
+        "Microsoft SQL Server": [r"sql server"], # Added SQL Server
+        "Cassandra": [r"cassandra"], # Added Cassandra
+        "Couchbase": [r"couchbase"], # Added Couchbase
+    },
+    "Servers": {
+        "Nginx": [r"server: nginx"],
+        "Apache": [r"server: apache"],
+        "LiteSpeed": [r"server: litespeed"],
+        "Caddy": [r"server: caddy"],
+        "IIS": [r"server: iis"],
+        "Tomcat": [r"apache-tomcat"], # Added Tomcat
+        "Jetty": [r"jetty"], # Added Jetty
+    },
+    "CDNs / Hosting": {
+        "Vercel": [r"x-vercel-id"],
+        "Netlify": [r"netlify"],
+        "Cloudflare": [r"cf-ray", r"cf-cache-status"],
+        "Akamai": [r"akamai"],
+        "AWS CloudFront": [r"x-amz-cf-id"],
+        "Firebase Hosting": [r"firebase"],
+        "Heroku": [r"heroku"],
+        "Google Cloud Platform": [r"x-goog-gfe"],
+        "Azure": [r"azurewebsites\.net"], # Added Azure hosting
+        "AWS S3": [r"amazonaws\.com"], # Added AWS S3
+        "DigitalOcean Spaces": [r"digitaloceanspaces\.com"], # Added DigitalOcean Spaces
+    },
+    "Analytics": {
+        "Google Analytics": [r"gtag\.js", r"ga\.js"],
+        "Google Tag Manager": [r"googletagmanager\.com"],
+        "Hotjar": [r"hotjar"],
+        "Mixpanel": [r"mixpanel"],
+        "Facebook Pixel": [r"fbq\("],
+        "Amplitude": [r"amplitude\.js"],
+        "Matomo": [r"matomo\.js"], # Added Matomo
+        "Segment": [r"segment\.io"], # Added Segment
+        "Plausible Analytics": [r"plausible\.io/js/script\.js"], # Added Plausible
+    },
+    "Payment / Auth": {
+        "Stripe": [r"js\.stripe\.com"],
+        "Razorpay": [r"checkout\.razorpay\.com"],
+        "PayPal": [r"paypalobjects\.com"],
+        "Auth0": [r"auth0\.com"],
+        "Firebase Auth": [r"identitytoolkit\.googleapis\.com"],
+        "Okta": [r"okta\.com"],
+        "Paddle": [r"paddle\.js"], # Added Paddle
+        "Square": [r"squarecdn\.com"], # Added Square
+        "Adyen": [r"adyen\.com"], # Added Adyen
+    },
+    "CMS & E-commerce": {
+        "WordPress": [r"wp-content"],
+        "Drupal": [r"drupal-settings-json"],
+        "Shopify": [r"cdn\.shopify\.com"],
+        "Magento": [r"mage/cookies\.js"],
+        "Wix": [r"wixstatic\.com"],
+        "Joomla": [r"joomla"],
+        "SquareSpace": [r"squarespace\.com"],
+        "WooCommerce": [r"woocommerce"], # Added WooCommerce
+        "Headless CMS": [r"graphql.*cms", r"api.*cms"], # Generic pattern for headless CMS
+        "Contentful": [r"cdn\.contentful\.com"], # Added Contentful
+        "Strapi": [r"strapi"], # Added Strapi
+        "Ghost": [r"ghost-cdn\.com"], # Added Ghost
+    },
+    "Other": {
+        "GraphQL": [r"graphql"],
+        "Webpack": [r"webpack"],
+        "Babel": [r"babel"],
+        "Docker": [r"docker"],
+        "Kubernetes": [r"kubernetes"],
+        "REST API": [r"api/v\d+", r"/api/"], # Generic pattern for REST API
+        "gRPC": [r"grpc-web"], # Added gRPC
+        "WebAssembly": [r"wasm"], # Added WebAssembly
+        "Storybook": [r"storybook"], # Added Storybook
+        "Cypress": [r"cypress"], # Added Cypress
+        "Selenium": [r"selenium"], # Added Selenium
+        "WebSockets": [r"websocket"], # Added WebSockets
+        "Service Workers": [r"service-worker\.js"], # Added Service Workers
+    },
+}
+
+
+# --------------------------
+# Registry
+# --------------------------
+
+
+@dataclass(frozen=True)
+class TechSignature:
+    name: str
+    category: str
+    patterns: Tuple[str, ...]  # compiled once, by TechMatcher
+
+
+TECH_REGISTRY: Dict[str, TechSignature] = {
+    name: TechSignature(
+        name=name,
+        category=category,
+        patterns=tuple(patterns),
+    )
+    for category, techs in TECH_CATALOG.items()
+    for name, patterns in techs.items()
+}
+
+# technology -> category, so formatters group detected tech in O(detected)
+TECH_CATEGORIES: Dict[str, str] = {name: sig.category for name, sig in TECH_REGISTRY.items()}
+
+# Flat technology -> patterns view used by the matcher
+TECH_SIGNATURES: Dict[str, List[str]] = {name: list(sig.patterns) for name, sig in TECH_REGISTRY.items()}
+
+
+def group_by_category(detected_tech: List[str]) -> Dict[str, List[str]]:
+    """Split detected technologies by category, keeping their order; unknown names go to "Other"."""
+    groups: Dict[str, List[str]] = {}
+    for tech in detected_tech:
+        groups.setdefault(TECH_CATEGORIES.get(tech, "Other"), []).append(tech)
+    return groups
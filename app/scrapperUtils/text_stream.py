@@ -0,0 +1,156 @@
+import re
+from html.parser import HTMLParser
+from typing import List, Optional
+
+
+# Same tag handling as get_text_from_html, without building a tree
+SKIPPED_TAGS = frozenset({"script", "style", "noscript", "footer", "header", "form", "button"})
+HEADING_TAGS = {"h1": 1, "h2": 2, "h3": 3, "h4": 4, "h5": 5, "h6": 6}
+
+_CHUNK_SIZE = 64 * 1024
+
+
+class StreamingTextExtractor(HTMLParser):
+    """
+    One-pass HTML -> markdown-ish text, matching what ``get_text_from_html``
+    produces (headings prefixed with ``#``, list items with ``*``, one text
+    node per line) while only ever holding the output in memory.
+
+    Also records the title, script srcs and link hrefs on the way through so
+    a large page never needs a parse tree at all.
+    """
+
+    def __init__(self, max_output_chars: Optional[int] = None):
+        super().__init__(convert_charrefs=True)
+        self.max_output_chars = max_output_chars
+        self.title: Optional[str] = None
+        self.scripts: List[str] = []
+        self.links: List[str] = []
+        self.truncated = False  # input or output hit its cap
+        self._output_full = False
+        self._pieces: List[str] = []
+        self._length = 0
+        self._skip_stack: List[str] = []
+        self._in_title = False
+        self._title_parts: List[str] = []
+        self._buffer: List[str] = []
+
+    # --------------------------
+    # Output
+    # --------------------------
+
+    def _emit(self, piece: str):
+        # Once the text cap is hit we keep parsing (links and scripts still
+        # matter for crawling) but stop accumulating text.
+        if self._output_full:
+            return
+        if self._pieces:
+            piece = "\n" + piece
+        if self.max_output_chars is not None and self._length + len(piece) > self.max_output_chars:
+            piece = piece[:self.max_output_chars - self._length]
+            self._output_full = self.truncated = True
+        self._pieces.append(piece)
+        self._length += len(piece)
+
+    def text(self) -> str:
+        return "".join(self._pieces).strip()
+
+    # --------------------------
+    # Parser callbacks
+    # --------------------------
+
+    def _flush(self):
+        # The parser may deliver one text node in several pieces (e.g. across
+        # feed() chunks); treat everything between two tags as one node.
+        if not self._buffer:
+            return
+        data = "".join(self._buffer)
+        self._buffer = []
+        if self._in_title:
+            self._title_parts.append(data.strip())
+        if self._skip_stack:
+            return
+        piece = data.strip()
+        if piece:
+            self._emit(re.sub(r"\n{3,}", "\n\n", piece))
+
+    def handle_starttag(self, tag, attrs):
+        self._flush()
+        if tag == "script":
+            src = dict(attrs).get("src")
+            if src:
+                self.scripts.append(src)
+        elif tag == "a":
+            href = dict(attrs).get("href")
+            if href is not None:
+                self.links.append(href)
+        elif tag == "title" and self.title is None:
+            self._in_title = True
+
+        if tag in SKIPPED_TAGS:
+            self._skip_stack.append(tag)
+        elif not self._skip_stack:
+            if tag in HEADING_TAGS:
+                self._emit("#" * HEADING_TAGS[tag])
+            elif tag == "li":
+                self._emit("*")
+
+    def handle_startendtag(self, tag, attrs):
+        # <script src="..."/> and friends: record attributes, never open a skip scope
+        self._flush()
+        if tag == "script":
+            src = dict(attrs).get("src")
+            if src:
+                self.scripts.append(src)
+        elif tag == "a":
+            href = dict(attrs).get("href")
+            if href is not None:
+                self.links.append(href)
+
+    def handle_endtag(self, tag):
+        self._flush()
+        if tag == "title" and self._in_title:
+            self._in_title = False
+            self.title = "".join(self._title_parts)
+        if self._skip_stack and tag in SKIPPED_TAGS:
+            # Pop back to the matching open tag; tolerates sloppy nesting
+            while self._skip_stack:
+                if self._skip_stack.pop() == tag:
+                    break
+
+    def handle_data(self, data):
+        self._buffer.append(data)
+
+    def handle_comment(self, data):
+        self._flush()
+
+    def handle_decl(self, decl):
+        self._flush()
+
+    def handle_pi(self, data):
+        self._flush()
+
+    def close(self):
+        super().close()
+        self._flush()
+
+
+def stream_parse_html(
+    html: str,
+    max_input_chars: Optional[int] = None,
+    max_output_chars: Optional[int] = None,
+) -> StreamingTextExtractor:
+    """
+    Feed ``html`` (cut to ``max_input_chars``) through a StreamingTextExtractor
+    in chunks; text beyond ``max_output_chars`` is dropped.
+    """
+    extractor = StreamingTextExtractor(max_output_chars)
+    if max_input_chars is not None and len(html) > max_input_chars:
+        html = html[:max_input_chars]
+        extractor.truncated = True
+    for start in range(0, len(html), _CHUNK_SIZE):
+        extractor.feed(html[start:start + _CHUNK_SIZE])
+    extractor.close()
+    if extractor._in_title and extractor.title is None:
+        extractor.title = "".join(extractor._title_parts)
+    return extractor
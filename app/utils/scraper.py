@@ -1,14 +1,33 @@
-import subprocess
-from playwright.sync_api import sync_playwright
-import multiprocessing
-from functools import partial
-import asyncio
-import sys
+from playwright.async_api import Page
 import urllib.parse
-from typing import Dict, List, Set, cast
+from typing import AsyncIterator, Dict, Iterable, Iterator, List, Optional, Tuple, cast
 from bs4 import BeautifulSoup, Tag
 import re
 import json
+import httpx
+import asyncio
+from functools import partial
+
+from ..config import settings
+from .. import metrics
+from ..scrapperUtils.analysis import analysis_pool
+from ..scrapperUtils.browser_pool import browser_pool
+from ..scrapperUtils.cache import cache_key, scrape_cache
+from ..scrapperUtils.crawler import crawl, error_result, FetchFn
+from ..scrapperUtils.fingerprints import (
+    content_fingerprint, get_fingerprint, refresh_validators, save_fingerprint, text_diff,
+)
+from ..scrapperUtils.frontier import CrawlFrontier, canonical_netloc
+from ..scrapperUtils.document import HTML_PARSER, ParsedDocument
+from ..scrapperUtils.http_client import get_http_client
+from ..scrapperUtils.politeness import THROTTLE_STATUSES, politeness
+from ..scrapperUtils.robots import RobotsRules, origin_of, robots_store
+from ..scrapperUtils.simhash import SimHashIndex, simhash, word_count
+from ..scrapperUtils.sitemap import iter_sitemap_entries, rank_entries
+from ..scrapperUtils.render_profiles import RENDER_PROFILES, RenderProfile, apply_render_profile
+from ..scrapperUtils.tech_matcher import TechMatcher
+from ..scrapperUtils.tech_signatures import TECH_SIGNATURES, group_by_category
+from ..scrapperUtils.text_stream import stream_parse_html
 
 # --------------------------
 # Utility functions
@@ -23,7 +42,11 @@ def normalize_url(input_url: str) -> str:
 
 
 def get_text_from_html(html: str) -> str:
-    soup = BeautifulSoup(html, "html.parser")
+    return _text_from_soup(BeautifulSoup(html, HTML_PARSER))
+
+
+def _text_from_soup(soup: BeautifulSoup) -> str:
+    # Note: mutates the soup, so run it after everything else has been read from it.
     # Remove potentially noisy tags
     for element in soup(['script', 'style', 'noscript', 'footer', 'header', 'form', 'button']):
         tag = cast(Tag, element)
@@ -55,272 +78,474 @@ def get_text_from_html(html: str) -> str:
     return content.strip()
 
 # --------------------------
-# Tech detection dictionary
+# Tech stack detection
 # --------------------------
 
 
-TECH_SIGNATURES = {
-    # Frontend
-    "React": [r"id=['\"]root['\"]", r"react", r"react-dom"],
-    "Next.js": [r"id=['\"]__next['\"]", r"_next/static"],
-    "Vue.js": [r"vue(\.runtime)?\.js", r"_NUXT_"],
-    "Angular": [r"ng-version"],
-    "Svelte": [r"svelte"],
-    "jQuery": [r"jquery.*\.js"],
-    "Bootstrap": [r"bootstrap.\.css", r"bootstrap.\.js"],
-    "Tailwind CSS": [r"tailwind.*\.css"],
-    "Bulma": [r"bulma\.css"],
-    "Foundation": [r"foundation\.css"],
-    "Vuex": [r"vuex"],
-    "Redux": [r"redux"],
-    "Gatsby": [r"id=['\"]___gatsby['\"]"],
-    "Nuxt.js": [r"_NUXT_"],
-    "Vuetify": [r"vuetify\.min\.js"],
-    "Preact": [r"preact"], # Added Preact
-    "Lit": [r"lit-html"], # Added Lit
-    "Dojo": [r"dojo\.js"], # Added Dojo Toolkit
-
-
-    # Backend
-    "Express.js": [r"x-powered-by.*express"],
-    "NestJS": [r"nestjs"],
-    "Django": [r"csrftoken"],
-    "Flask": [r"flask"],
-    "Rails": [r"_rails_session", r"x-runtime"],
-    "Laravel": [r"laravel_session", r"x-powered-by.*php"],
-    "ASP.NET": [r"ASP\.NET", r"aspnet"],
-    "Spring Boot": [r"jsessionid"],
-    "Node.js": [r"x-powered-by.*nodejs"],
-    "Go": [r"go version"],
-    "Ruby": [r"ruby version"],
-    "PHP": [r"x-powered-by.*php"],
-    "Python": [r"python version", r"server: python"], # Added Python server detection
-    "Java": [r"java version", r"server: java"], # Added Java server detection
-    "C#": [r"c# version", r"server: c#"], # Added C# server detection
-    "Kotlin": [r"kotlin"], # Added Kotlin
-    "Rust": [r"rustc version"], # Added Rust
-    "Scala": [r"scala version"], # Added Scala
-
-
-    # Databases
-    "MongoDB": [r"ObjectId", r"_id"],
-    "PostgreSQL": [r"PG::", r"postgres"],
-    "MySQL": [r"MySQL"],
-    "Firebase": [r"firebaseio\.com", r"firestore"],
-    "Supabase": [r"supabase\.co"],
-    "Redis": [r"redis"],
-    "Elasticsearch": [r"elasticsearch"],
-    "SQLite": [r"sqlite"], # Added SQLite
-    "Microsoft SQL Server": [r"sql server"], # Added SQL Server
-    "Cassandra": [r"cassandra"], # Added Cassandra
-    "Couchbase": [r"couchbase"], # Added Couchbase
-
-
-    # Servers
-    "Nginx": [r"server: nginx"],
-    "Apache": [r"server: apache"],
-    "LiteSpeed": [r"server: litespeed"],
-    "Caddy": [r"server: caddy"],
-    "IIS": [r"server: iis"],
-    "Tomcat": [r"apache-tomcat"], # Added Tomcat
-    "Jetty": [r"jetty"], # Added Jetty
-
-
-    # CDNs / Hosting
-    "Vercel": [r"x-vercel-id"],
-    "Netlify": [r"netlify"],
-    "Cloudflare": [r"cf-ray", r"cf-cache-status"],
-    "Akamai": [r"akamai"],
-    "AWS CloudFront": [r"x-amz-cf-id"],
-    "Firebase Hosting": [r"firebase"],
-    "Heroku": [r"heroku"],
-    "Google Cloud Platform": [r"x-goog-gfe"],
-    "Azure": [r"azurewebsites\.net"], # Added Azure hosting
-    "AWS S3": [r"amazonaws\.com"], # Added AWS S3
-    "DigitalOcean Spaces": [r"digitaloceanspaces\.com"], # Added DigitalOcean Spaces
-
-
-    # Analytics
-    "Google Analytics": [r"gtag\.js", r"ga\.js"],
-    "Google Tag Manager": [r"googletagmanager\.com"],
-    "Hotjar": [r"hotjar"],
-    "Mixpanel": [r"mixpanel"],
-    "Facebook Pixel": [r"fbq\("],
-    "Amplitude": [r"amplitude\.js"],
-    "Matomo": [r"matomo\.js"], # Added Matomo
-    "Segment": [r"segment\.io"], # Added Segment
-    "Plausible Analytics": [r"plausible\.io/js/script\.js"], # Added Plausible
-
-
-    # Payment / Auth
-    "Stripe": [r"js\.stripe\.com"],
-    "Razorpay": [r"checkout\.razorpay\.com"],
-    "PayPal": [r"paypalobjects\.com"],
-    "Auth0": [r"auth0\.com"],
-    "Firebase Auth": [r"identitytoolkit\.googleapis\.com"],
-    "Okta": [r"okta\.com"],
-    "Paddle": [r"paddle\.js"], # Added Paddle
-    "Square": [r"squarecdn\.com"], # Added Square
-    "Adyen": [r"adyen\.com"], # Added Adyen
-
-
-    # CMS & E-commerce
-    "WordPress": [r"wp-content"],
-    "Drupal": [r"drupal-settings-json"],
-    "Shopify": [r"cdn\.shopify\.com"],
-    "Magento": [r"mage/cookies\.js"],
-    "Wix": [r"wixstatic\.com"],
-    "Joomla": [r"joomla"],
-    "SquareSpace": [r"squarespace\.com"],
-    "WooCommerce": [r"woocommerce"], # Added WooCommerce
-    "Headless CMS": [r"graphql.*cms", r"api.*cms"], # Generic pattern for headless CMS
-    "Contentful": [r"cdn\.contentful\.com"], # Added Contentful
-    "Strapi": [r"strapi"], # Added Strapi
-    "Ghost": [r"ghost-cdn\.com"], # Added Ghost
-
-
-    # Other
-    "GraphQL": [r"graphql"],
-    "Webpack": [r"webpack"],
-    "Babel": [r"babel"],
-    "Docker": [r"docker"],
-    "Kubernetes": [r"kubernetes"],
-    "REST API": [r"api/v\d+", r"/api/"], # Generic pattern for REST API
-    "gRPC": [r"grpc-web"], # Added gRPC
-    "WebAssembly": [r"wasm"], # Added WebAssembly
-    "Storybook": [r"storybook"], # Added Storybook
-    "Cypress": [r"cypress"], # Added Cypress
-    "Selenium": [r"selenium"], # Added Selenium
-    "WebSockets": [r"websocket"], # Added WebSockets
-    "Service Workers": [r"service-worker\.js"], # Added Service Workers
+_TECH_MATCHER = TechMatcher(TECH_SIGNATURES)
 
 
-}
+def detect_tech(html: str, scripts: List[str], headers: Dict[str, str]) -> List[str]:
+    header_str = " ".join([f"{k}:{v}" for k, v in headers.items()])
+    # Script srcs and headers are tiny, so they are scanned as one newline-joined
+    # source; no signature can match across a newline.
+    extra = "\n".join(scripts + [header_str])
+    with metrics.stage("detect_tech"):
+        return sorted(_TECH_MATCHER.match([html, extra]))
 
 # --------------------------
-# Tech stack detection
+# Main scraper
 # --------------------------
 
 
-def detect_tech(html: str, scripts: List[str], headers: Dict[str, str]) -> List[str]:
-    detected = set()
-    content_sources = [html.lower()] + [s.lower() for s in scripts]
-    header_str = " ".join([f"{k}:{v}" for k, v in headers.items()])
-    content_sources.append(header_str.lower())
 
-    for tech, patterns in TECH_SIGNATURES.items():
-        for pattern in patterns:
-            for source in content_sources:
-                if re.search(pattern, source, re.IGNORECASE):
-                    detected.add(tech)
-                    break
-    return sorted(detected)
+def parse_document(url: str, html: str, headers: Dict[str, str]) -> ParsedDocument:
+    """Parse a page once and pull out everything the later stages need."""
+    if len(html) > settings.TEXT_STREAM_THRESHOLD:
+        # Huge page: one streaming pass with bounded memory instead of a tree
+        extractor = stream_parse_html(html, settings.TEXT_MAX_INPUT_CHARS, settings.TEXT_MAX_OUTPUT_CHARS)
+        return ParsedDocument(
+            url=url,
+            raw_html=html,
+            headers=headers,
+            title=extractor.title,
+            scripts=extractor.scripts,
+            links=extractor.links,
+            text=extractor.text(),
+            detected_tech=detect_tech(html, extractor.scripts, headers),
+        )
 
-# --------------------------
-# Main scraper
-# --------------------------
+    soup = BeautifulSoup(html, HTML_PARSER)
+
+    title_tag = soup.find("title")
+    title = title_tag.get_text(strip=True) if title_tag else None
+
+    # ✅ Ensure tag is a Tag before calling .get()
+    scripts = []
+    for tag in soup.find_all("script", src=True):
+        if isinstance(tag, Tag):
+            src = tag.get("src")
+            if isinstance(src, str):
+                scripts.append(src)
+
+    links = []
+    for link in soup.find_all("a", href=True):
+        if isinstance(link, Tag):
+            href = link.get("href")
+            if isinstance(href, str):  # ✅ ensure it's a string
+                links.append(href)
+
+    return ParsedDocument(
+        url=url,
+        raw_html=html,
+        headers=headers,
+        title=title,
+        scripts=scripts,
+        links=links,
+        text=_text_from_soup(soup),
+        detected_tech=detect_tech(html, scripts, headers),
+    )
+
+
+def analyze_page(url: str, html: str, headers: Dict[str, str]) -> Tuple[ParsedDocument, List[Tuple[str, float, int]]]:
+    """
+    Analysis-pool entry point: ``parse_document`` without shipping the HTML
+    back, plus its stage timings for the caller to record.
+    """
+    with metrics.collect(observe=False) as timings:
+        with metrics.stage("parse"):
+            doc = parse_document(url, html, headers)
+    doc.raw_html = ""
+    return doc, timings.items()
+
+
+async def _analyze(url: str, html: str, headers: Dict[str, str]) -> ParsedDocument:
+    # "analysis" also covers waiting for a worker and shipping the page to it
+    with metrics.stage("analysis"):
+        doc, timings = await analysis_pool.run(analyze_page, url, html, headers)
+    metrics.merge(timings)
+    doc.raw_html = html
+    return doc
+
+
+async def _render_page(page: Page, url: str, profile: RenderProfile) -> Tuple[str, Dict[str, str], Optional[int]]:
+    """Render a single URL on a leased page and return its html, headers and status."""
+    handler = await apply_render_profile(page, profile)
+    try:
+        with metrics.stage("goto"):
+            response = await page.goto(url, timeout=settings.NAVIGATION_TIMEOUT_MS, wait_until=profile.wait_until)
+        if profile.wait_for_network_idle:
+            with metrics.stage("networkidle"):
+                await page.wait_for_load_state('networkidle')
+        with metrics.stage("page_content"):
+            html = await page.content()
+    finally:
+        # The page goes back to the pool; the next lease may want another profile
+        if handler is not None:
+            await page.unroute("**/*", handler)
 
+    headers = {}
+    if response is not None:
+        headers = {k.lower(): v for k, v in response.headers.items()}
+    return html, headers, response.status if response is not None else None
 
 
-def _scrape_single_process(start_url: str, max_pages: int) -> List[Dict]:
-    start_url = normalize_url(start_url)
-    visited: Set[str] = set()
-    results = []
-    
-    parsed_start = urllib.parse.urlparse(start_url)
-    base_domain = f"{parsed_start.scheme}://{parsed_start.netloc}"
+def _response_status(response: httpx.Response) -> Tuple[Optional[int], Optional[str]]:
+    return response.status_code, response.headers.get("retry-after")
+
+
+def _rendered_status(rendered: Tuple[str, Dict[str, str], Optional[int]]) -> Tuple[Optional[int], Optional[str]]:
+    _, headers, status = rendered
+    return status, headers.get("retry-after")
+
+
+_EMPTY_APP_SHELL = re.compile(
+    r"<div[^>]+id=['\"](?:root|__next|app|__nuxt|___gatsby)['\"][^>]*>\s*</div>",
+    re.IGNORECASE,
+)
+
+
+def looks_client_rendered(doc: ParsedDocument) -> bool:
+    """Heuristic: does this server response need a browser to produce its content?"""
+    if _EMPTY_APP_SHELL.search(doc.raw_html):
+        return True
+    return len(doc.text) < settings.STATIC_MIN_TEXT_CHARS
 
-    def is_valid_link(href: str) -> bool:
-        return bool(href and (href.startswith('/') or href.startswith(base_domain)))
 
+async def _fetch_page(url: str, profile: RenderProfile) -> Tuple[Dict, List[str]]:
+    # Each in-flight page holds its own lease, so the pool size also caps
+    # how many navigations run across all concurrent crawls. The host slot is
+    # taken first so a throttled host never sits on a browser page, and both
+    # are released before analysis so pages never wait on the CPU workers.
+    async def render():
+        async with browser_pool.page() as page:
+            return await _render_page(page, url, profile)
+
+    html, headers, status = await politeness.request(url, render, _rendered_status)
+    doc = await _analyze(url, html, headers)
+    result = doc.to_result()
+    result["status_code"] = status
+    result["served_by"] = "browser"
+    return result, doc.links
+
+
+async def _fetch_static(url: str) -> Optional[Tuple[Dict, List[str]]]:
+    """Plain HTTP fetch; returns None when the page has to be rendered instead."""
     try:
-        subprocess.run(['playwright', 'install'], check=True)
-    except Exception as e:
-        print(f"Warning: Failed to install playwright: {str(e)}")
-
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=True)
-        context = browser.new_context()
-        page = context.new_page()
-        queue = [start_url]
-
-        while queue and len(visited) < max_pages:
-            current_url = queue.pop(0)
-            if current_url in visited:
-                continue
-
-            response = None
-            try:
-                response = page.goto(current_url, timeout=15000)
-                page.wait_for_load_state('networkidle')
-                html = page.content()
-                visited.add(current_url)
-
-                soup = BeautifulSoup(html, "html.parser")
-
-                # ✅ Ensure tag is a Tag before calling .get()
-                scripts = []
-                for tag in soup.find_all("script", src=True):
-                    if isinstance(tag, Tag):
-                        src = tag.get("src")
-                        if isinstance(src, str):
-                            scripts.append(src)
-
-                headers = {}
-                if response is not None:
-                    headers = {k.lower(): v for k, v in response.headers.items()}
-
-                tech_stack = detect_tech(html, scripts, headers)
-                text = get_text_from_html(html)
-
-                results.append({
-                    "url": current_url,
-                    "detected_tech": tech_stack if tech_stack else ["Unknown"],
-                    "content": text,
-                    "raw_html": html
-                })
-
-                for link in soup.find_all("a", href=True):
-                    if isinstance(link, Tag):
-                     href = link.get("href")
-
-                     if isinstance(href, str):  # ✅ ensure it's a string
-                        full_url = urllib.parse.urljoin(base_domain, href)
-
-                        if (
-                            is_valid_link(full_url)  # ✅ validate the resolved URL
-                            and full_url not in visited
-                            and len(queue) + len(visited) < max_pages
-                        ):
-                            queue.append(full_url)
-
-            except Exception as e:
-                results.append({
-                    "url": current_url,
-                    "detected_tech": ["Error"],
-                    "content": str(e),
-                    "raw_html": ""
-                })
-
-        browser.close()
-
-    return results
-
-async def scrape_multiple_pages(start_url: str, max_pages: int = 3) -> List[Dict]:
+        with metrics.stage("http_fetch"):
+            response = await politeness.request(url, lambda: get_http_client().get(url), _response_status)
+    except httpx.HTTPError:
+        return None
+    if response.status_code in THROTTLE_STATUSES:
+        # Still throttled after backing off; a browser would be turned away too
+        response.raise_for_status()
+
+    content_type = response.headers.get("content-type", "")
+    if response.status_code >= 400 or "html" not in content_type:
+        return None
+
+    headers = {k.lower(): v for k, v in response.headers.items()}
+    doc = await _analyze(url, response.text, headers)
+    if looks_client_rendered(doc):
+        return None
+
+    result = doc.to_result()
+    result["status_code"] = response.status_code
+    result["served_by"] = "http"
+    return result, doc.links
+
+
+async def _fetch_page_static_first(url: str, profile: RenderProfile) -> Tuple[Dict, List[str]]:
+    fetched = await _fetch_static(url)
+    if fetched is not None:
+        return fetched
+    return await _fetch_page(url, profile)
+
+
+FETCH_MODES = {
+    "browser": _fetch_page,
+    "static": _fetch_page_static_first,
+}
+
+
+def _same_site_resolver(start_url: str, rules: Optional[RobotsRules] = None):
+    start_host = canonical_netloc(start_url)
+
+    def resolve(page_url: str, href: str) -> Optional[str]:
+        # Relative links are relative to the page they appear on, not the site root
+        full_url, _ = urllib.parse.urldefrag(urllib.parse.urljoin(page_url, href.strip()))
+        parts = urllib.parse.urlsplit(full_url)
+        if parts.scheme not in ("http", "https") or canonical_netloc(full_url) != start_host:
+            return None  # ✅ only crawl pages of the same site
+        if rules is not None and not rules.allowed(full_url):
+            return None
+        return full_url
+
+    return resolve
+
+
+async def _seed_from_sitemap(frontier: CrawlFrontier, start_url: str, rules: Optional[RobotsRules]) -> int:
+    """
+    Push the site's most relevant sitemap URLs (by priority, then lastmod)
+    into ``frontier`` so they are crawled without rendering pages to find
+    them. Returns how many were scheduled.
+    """
+    sitemaps = (rules.sitemaps if rules is not None else []) or [origin_of(start_url) + "/sitemap.xml"]
+    resolve = _same_site_resolver(start_url, rules)
+    entries = [entry async for entry in iter_sitemap_entries(sitemaps) if resolve(start_url, entry.url)]
+
+    seeded = 0
+    for entry in rank_entries(entries):
+        if frontier.full:
+            break
+        # Sitemap priority is 0..1; offset by 1 so seeds beat links found at the same depth
+        seeded += frontier.push(entry.url, depth=1, priority=1.0 + entry.priority)
+    return seeded
+
+
+def _page_simhash(text: str) -> Optional[int]:
+    # Too little text and every thin page would look like every other one
+    if word_count(text) < settings.CRAWL_DEDUP_MIN_WORDS:
+        return None
+    return simhash(text)
+
+
+def _with_dedup(fetch: FetchFn) -> FetchFn:
+    """
+    Collapse pages whose text is a near-duplicate (SimHash within
+    CRAWL_DEDUP_MAX_DISTANCE bits) of a page already seen in this crawl.
+    The duplicate keeps its url/title plus ``duplicate_of``; the crawl
+    engine queues its links behind everyone else's.
+    """
+    index: SimHashIndex[str] = SimHashIndex(settings.CRAWL_DEDUP_MAX_DISTANCE)
+
+    async def fetch_distinct(url: str):
+        result, links = await fetch(url)
+        text = result.get("content") or ""
+        if "Error" in result.get("detected_tech", []) or not text:
+            return result, links
+
+        fingerprint = await analysis_pool.run(_page_simhash, text)
+        if fingerprint is None:
+            return result, links
+        original = index.find(fingerprint)
+        if original is None:
+            index.add(fingerprint, result["url"])
+            return result, links
+
+        collapsed = {
+            **result,
+            "content": "",
+            "scripts": [],
+            "raw_html": "",
+            "duplicate_of": original,
+        }
+        return collapsed, links
+
+    return fetch_distinct
+
+
+def count_duplicates(results: List[Dict]) -> int:
+    return sum(1 for r in results if r.get("duplicate_of"))
+
+
+async def iter_scrape_pages(
+    start_url: str,
+    max_pages: int = 3,
+    concurrency: Optional[int] = None,
+    mode: str = "browser",
+    profile: Optional[str] = None,
+    max_depth: Optional[int] = None,
+    use_sitemap: bool = False,
+    recrawl_user_id=None,
+) -> AsyncIterator[Tuple[int, Dict]]:
+    """
+    Crawl up to ``max_pages`` same-site pages starting at ``start_url``,
+    yielding ``(crawl_index, result)`` as soon as each page is scraped.
+
+    ``mode="browser"`` renders every page in Chromium; ``mode="static"`` tries a
+    plain HTTP fetch first and only renders pages that look client-rendered.
+    Each result's ``served_by`` says which path produced it.
+
+    ``profile`` names an entry in ``RENDER_PROFILES`` controlling which
+    resources the browser is allowed to load (default: RENDER_PROFILE setting).
+
+    URLs are canonicalized before scheduling, so ``/page``, ``/page/`` and
+    ``/page?utm_source=x`` are fetched once; links deeper than ``max_depth``
+    (default: CRAWL_MAX_DEPTH setting) are not followed.
+
+    With ``use_sitemap`` the rest of the page budget is filled from the
+    site's sitemap(s), most relevant first, before any links are followed.
+    Pages robots.txt disallows are skipped and its crawl-delay is honoured
+    (ROBOTS_ENABLED setting).
+
+    ``recrawl_user_id`` turns on incremental recrawl against that user's
+    stored page fingerprints; see ``_with_fingerprints``.
+
+    Near-duplicate pages (pagination, tag archives, facets) are collapsed to
+    a stub with ``duplicate_of`` and their links de-prioritised, so the page
+    budget goes to distinct content; see ``_with_dedup``.
+    """
     start_url = normalize_url(start_url)
-    
-    # Create a process pool with just one process to run Playwright
-    with multiprocessing.Pool(1) as pool:
-        # Run the scraping in a separate process
-        result = await asyncio.get_event_loop().run_in_executor(
-            None,  # Uses default executor
-            partial(pool.apply, _scrape_single_process, (start_url, max_pages))
-        )
-        
-    return result
+    concurrency = concurrency or settings.CRAWL_CONCURRENCY
+    fetch = partial(FETCH_MODES[mode], profile=RENDER_PROFILES[profile or settings.RENDER_PROFILE])
+
+    rules = await robots_store.get(start_url) if settings.ROBOTS_ENABLED else None
+    if rules is not None and not rules.allowed(start_url):
+        yield 0, error_result(start_url, PermissionError("Disallowed by robots.txt"))
+        return
+    if recrawl_user_id is not None:
+        fetch = _with_fingerprints(fetch, recrawl_user_id)
+    if max_pages > 1 and settings.CRAWL_DEDUP_MAX_DISTANCE >= 0:
+        fetch = _with_dedup(fetch)
 
-    return results
+    frontier = CrawlFrontier(max_pages, settings.CRAWL_MAX_DEPTH if max_depth is None else max_depth)
+    frontier.push(start_url)
+    if use_sitemap and not frontier.full:
+        await _seed_from_sitemap(frontier, start_url, rules)
 
+    async for index, result in crawl(frontier, fetch, _same_site_resolver(start_url, rules), concurrency):
+        yield index, result
+
+
+async def scrape_multiple_pages(start_url: str, max_pages: int = 3, **options) -> List[Dict]:
+    """``iter_scrape_pages`` collected into a list in crawl order."""
+    collected = []
+    async for index, result in iter_scrape_pages(start_url, max_pages, **options):
+        collected.append((index, result))
+
+    # Pages finish out of order; hand them back in crawl order
+    collected.sort(key=lambda item: item[0])
+    return [result for _, result in collected]
+
+
+
+# --------------------------
+# Cached scraping
+# --------------------------
+
+
+async def _not_modified(url: str, headers: Dict) -> bool:
+    """
+    Conditional GET using the ``etag``/``last-modified`` in ``headers`` (as
+    stored with a page); True only on 304 Not Modified.
+    """
+    conditional = {}
+    if headers.get("etag"):
+        conditional["If-None-Match"] = headers["etag"]
+    if headers.get("last-modified"):
+        conditional["If-Modified-Since"] = headers["last-modified"]
+    if not conditional:
+        return False
+    client = get_http_client()
+
+    async def probe() -> httpx.Response:
+        # Stream and close at once so a 200 doesn't download a body we are about to re-render anyway
+        response = await client.send(client.build_request("GET", url, headers=conditional), stream=True)
+        await response.aclose()
+        return response
+
+    try:
+        response = await politeness.request(url, probe, _response_status)
+    except httpx.HTTPError:
+        return False
+    return response.status_code == 304
+
+
+async def scrape_with_cache(start_url: str, ttl: int, **options) -> Tuple[List[Dict], str]:
+    """
+    ``scrape_multiple_pages`` behind the scrape cache. Returns the results and
+    how they were served: "hit", "revalidated" (stale entry confirmed with
+    ETag/Last-Modified), "miss", or "bypass" when ``ttl`` is 0.
+    """
+    if ttl <= 0:
+        return await scrape_multiple_pages(start_url, **options), "bypass"
+
+    key = cache_key(normalize_url(start_url), options)
+    entry = await scrape_cache.get(key)
+    if entry is not None:
+        if scrape_cache.is_fresh(entry):
+            return entry["results"], "hit"
+        checks = await asyncio.gather(*(_not_modified(r["url"], r.get("headers") or {}) for r in entry["results"]))
+        if checks and all(checks):
+            await scrape_cache.refresh(key, entry, ttl)
+            return entry["results"], "revalidated"
+
+    results = await scrape_multiple_pages(start_url, **options)
+    if results and not any("Error" in r.get("detected_tech", []) for r in results):
+        await scrape_cache.put(key, start_url, results, ttl)
+    return results, "miss"
+
+
+# --------------------------
+# Incremental recrawl
+# --------------------------
+
+
+def _unchanged_result(url: str, stored: Dict) -> Dict:
+    # Served from the fingerprint store after a 304: nothing was rendered or parsed
+    return {
+        "url": url,
+        "title": stored.get("title"),
+        "detected_tech": stored.get("detected_tech") or ["Unknown"],
+        "content": "",
+        "scripts": [],
+        "links": stored.get("links", []),
+        "headers": {},
+        "raw_html": "",
+        "served_by": "fingerprint",
+        "change": "unchanged",
+    }
+
+
+def _with_fingerprints(fetch: FetchFn, user_id) -> FetchFn:
+    """
+    Wrap ``fetch`` so pages are compared with what ``user_id`` saw last time.
+
+    A page whose ETag/Last-Modified still validates is not fetched at all;
+    its stored links keep the crawl going. Otherwise the page is scraped and
+    marked "new", "changed" (with a text ``diff``) or "unchanged" by content
+    fingerprint. Only new and changed pages are written back, so both work
+    and Mongo writes grow with the amount of change, not the site's size.
+    """
+    async def fetch_incrementally(url: str):
+        stored = await get_fingerprint(user_id, url)
+        if stored is not None and await _not_modified(
+            url, {"etag": stored.get("etag"), "last-modified": stored.get("last_modified")}
+        ):
+            return _unchanged_result(url, stored), stored.get("links", [])
+
+        result, links = await fetch(url)
+        if "Error" in result.get("detected_tech", []):
+            return result, links
+
+        fingerprint = content_fingerprint(result)
+        if stored is None:
+            result["change"] = "new"
+        elif stored.get("fingerprint") == fingerprint:
+            result["change"] = "unchanged"
+            # New validators for the same content: keep them so next run can skip the fetch
+            await refresh_validators(stored, result.get("headers") or {})
+            return result, links
+        else:
+            result["change"] = "changed"
+            result["diff"] = await analysis_pool.run(text_diff, stored.get("content", ""), result.get("content", ""))
+        await save_fingerprint(user_id, result, links, fingerprint)
+        return result, links
+
+    return fetch_incrementally
+
+
+def summarize_changes(results: List[Dict]) -> Dict:
+    """Which pages are new or changed since the previous recrawl."""
+    summary = {"new": [], "changed": [], "unchanged": 0}
+    for r in results:
+        change = r.get("change")
+        if change == "unchanged":
+            summary["unchanged"] += 1
+        elif change in ("new", "changed"):
+            summary[change].append(r.get("url"))
+    return summary
 
 
 # --------------------------
@@ -335,57 +560,50 @@ def format_json_output(markdown_content: str) -> str:
     return json_string
 
 
+# (registry category, section heading), in report order; everything else is "Other Technologies"
+MARKDOWN_TECH_SECTIONS = [
+    ("Frontend", "Frontend"),
+    ("Backend", "Backend"),
+    ("Databases", "Databases"),
+    ("CDNs / Hosting", "Hosting & CDN"),
+]
+
+
 def format_markdown_output(results: List[Dict]) -> str:
-    md_output = []
+    return "".join(iter_markdown_output(results))
+
+
+def iter_markdown_output(results: Iterable[Dict]) -> Iterator[str]:
+    """Markdown report, one chunk per page, so large crawls can be written out incrementally."""
     for r in results:
         if not isinstance(r, dict):
             continue
+        md_output = []
 
         url = r.get('url', 'Unknown URL')
-        soup = BeautifulSoup(r.get('raw_html', ''), 'html.parser')
+        title = r.get('title')
         detected_tech = r.get('detected_tech', [])
 
         # Site Header
         md_output.append(f"# Website Analysis: {url}\n")
         
         # Site Title
-        title = soup.find('title')
         if title:
-            md_output.append(f"## {title.get_text(strip=True)}\n")
+            md_output.append(f"## {title}\n")
 
         # Technology Stack Section
         md_output.append("\n## Technology Stack\n")
         
-        # Frontend Technologies
-        frontend_tech = [tech for tech in detected_tech if tech in TECH_SIGNATURES.keys() and tech in next(iter([k for k, v in TECH_SIGNATURES.items() if k.startswith('Frontend')]), [])]
-        if frontend_tech:
-            md_output.append("\n### Frontend\n")
-            for tech in frontend_tech:
-                md_output.append(f"- **{tech}**\n")
-
-        # Backend Technologies
-        backend_tech = [tech for tech in detected_tech if tech in TECH_SIGNATURES.keys() and tech in next(iter([k for k, v in TECH_SIGNATURES.items() if k.startswith('Backend')]), [])]
-        if backend_tech:
-            md_output.append("\n### Backend\n")
-            for tech in backend_tech:
-                md_output.append(f"- **{tech}**\n")
-
-        # Database Technologies
-        db_tech = [tech for tech in detected_tech if tech in TECH_SIGNATURES.keys() and tech in next(iter([k for k, v in TECH_SIGNATURES.items() if k.startswith('Databases')]), [])]
-        if db_tech:
-            md_output.append("\n### Databases\n")
-            for tech in db_tech:
-                md_output.append(f"- **{tech}**\n")
-
-        # Hosting/CDN Technologies
-        hosting_tech = [tech for tech in detected_tech if tech in TECH_SIGNATURES.keys() and tech in next(iter([k for k, v in TECH_SIGNATURES.items() if k.startswith('CDNs / Hosting')]), [])]
-        if hosting_tech:
-            md_output.append("\n### Hosting & CDN\n")
-            for tech in hosting_tech:
-                md_output.append(f"- **{tech}**\n")
+        groups = group_by_category(detected_tech)
+        for category, heading in MARKDOWN_TECH_SECTIONS:
+            techs = groups.pop(category, [])
+            if techs:
+                md_output.append(f"\n### {heading}\n")
+                for tech in techs:
+                    md_output.append(f"- **{tech}**\n")
 
         # Analytics and Other Technologies
-        other_tech = [tech for tech in detected_tech if tech not in frontend_tech + backend_tech + db_tech + hosting_tech]
+        other_tech = [tech for techs in groups.values() for tech in techs]
         if other_tech:
             md_output.append("\n### Other Technologies\n")
             for tech in other_tech:
@@ -404,12 +622,16 @@ def format_markdown_output(results: List[Dict]) -> str:
                 md_output.append(f"- [{link}]({link})\n")
 
         md_output.append("\n---\n\n")
-
-    return "".join(md_output)
+        yield "".join(md_output)
 
 
 def format_text_output(results: List[Dict]) -> str:
-    text_output = []
+    return "".join(iter_text_output(results))
+
+
+def iter_text_output(results: Iterable[Dict]) -> Iterator[str]:
+    """Plain-text report, one chunk per page; joined they equal ``format_text_output``."""
+    first = True
     for r in results:
         if not isinstance(r, dict):
             continue
@@ -418,36 +640,41 @@ def format_text_output(results: List[Dict]) -> str:
         if not isinstance(url, str):
             url = str(url)
 
-        soup = BeautifulSoup(r.get('raw_html', ''), 'html.parser')
-        title = soup.find('title')
-        title_text = title.get_text(strip=True) if title else 'No Title'
+        title_text = r.get('title') or 'No Title'
 
         detected_tech = r.get('detected_tech', ['Unknown'])
         content = r.get('content', 'No content available.')
         if not isinstance(content, str):
             content = str(content)
 
+        groups = group_by_category(detected_tech)
+
         # Structure the output in a more readable format
-        text_output.extend([
+        text_output = [
             f"Website: {url}",
             f"Title: {title_text}",
             "\nTechnology Stack:",
             "----------------",
             "Frontend:",
-            "  " + ", ".join([tech for tech in detected_tech if tech in TECH_SIGNATURES.keys() and tech in next(iter([k for k, v in TECH_SIGNATURES.items() if k.startswith('Frontend')]), [])] or ['None detected']),
+            "  " + ", ".join(groups.get("Frontend") or ['None detected']),
             "\nBackend:",
-            "  " + ", ".join([tech for tech in detected_tech if tech in TECH_SIGNATURES.keys() and tech in next(iter([k for k, v in TECH_SIGNATURES.items() if k.startswith('Backend')]), [])] or ['None detected']),
+            "  " + ", ".join(groups.get("Backend") or ['None detected']),
             "\nDatabases:",
-            "  " + ", ".join([tech for tech in detected_tech if tech in TECH_SIGNATURES.keys() and tech in next(iter([k for k, v in TECH_SIGNATURES.items() if k.startswith('Databases')]), [])] or ['None detected']),
+            "  " + ", ".join(groups.get("Databases") or ['None detected']),
             "\nHosting/CDN:",
-            "  " + ", ".join([tech for tech in detected_tech if tech in TECH_SIGNATURES.keys() and tech in next(iter([k for k, v in TECH_SIGNATURES.items() if k.startswith('CDNs / Hosting')]), [])] or ['None detected']),
+            "  " + ", ".join(groups.get("CDNs / Hosting") or ['None detected']),
             "\nContent Preview:",
             "---------------",
             content[:1000] + ('...' if len(content) > 1000 else ''),
             "\n" + "="*50 + "\n"
-        ])
-    
-    return "\n".join(text_output)
+        ]
+        yield ("" if first else "\n") + "\n".join(text_output)
+        first = False
+
+def render_reports(results: List[Dict]) -> Tuple[str, str]:
+    """Markdown and text reports in one call, for running in the analysis pool."""
+    return format_markdown_output(results), format_text_output(results)
+
 
 def format_ai_response_output(results: List[Dict]) -> str:
      # Placeholder for AI summarization or analysis
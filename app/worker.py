@@ -0,0 +1,110 @@
+"""
+Standalone scrape worker.
+
+    python -m app.worker
+
+Leases crawl jobs from the Mongo ``jobs`` collection, runs them with the
+scraper in ``app/utils/scraper.py`` and stores the results. Run as many
+processes as the browser tier needs; jobs held by a worker that dies are
+re-leased once their lease expires.
+"""
+import asyncio
+import logging
+import os
+import signal
+import socket
+import uuid
+
+from .config import settings
+from .scrapperUtils.analysis import analysis_pool
+from .scrapperUtils.browser_pool import browser_pool
+from .scrapperUtils.http_client import close_http_client
+from .scrapperUtils.jobs import complete_job, create_job_indexes, fail_abandoned_jobs, fail_job, heartbeat, lease_job
+from .utils.scraper import scrape_multiple_pages
+
+logger = logging.getLogger("app.worker")
+
+
+async def _keep_lease(job_id, worker_id: str):
+    while True:
+        await asyncio.sleep(settings.JOB_LEASE_SECONDS / 3)
+        if not await heartbeat(job_id, worker_id):
+            logger.warning(f"Lost lease on job {job_id}")
+            return
+
+
+async def _run_job(job, worker_id: str):
+    lease = asyncio.create_task(_keep_lease(job["_id"], worker_id))
+    try:
+        options = dict(job.get("options", {}))
+        if options.pop("recrawl", False):
+            options["recrawl_user_id"] = job["user_id"]
+        results = await scrape_multiple_pages(job["url"], **options)
+        if await complete_job(job["_id"], worker_id, results):
+            logger.info(f"Job {job['_id']} done: {len(results)} pages")
+    except Exception as e:
+        logger.exception(f"Job {job['_id']} failed")
+        await fail_job(job, worker_id, str(e))
+    finally:
+        lease.cancel()
+
+
+async def _job_loop(worker_id: str, stopping: asyncio.Event):
+    while not stopping.is_set():
+        try:
+            job = await lease_job(worker_id)
+        except Exception:
+            logger.exception("Failed to lease a job")
+            job = None
+        if job is None:
+            try:
+                await asyncio.wait_for(stopping.wait(), timeout=settings.WORKER_POLL_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+            continue
+        await _run_job(job, worker_id)
+
+
+async def _sweep_loop(stopping: asyncio.Event):
+    while not stopping.is_set():
+        try:
+            failed = await fail_abandoned_jobs()
+            if failed:
+                logger.warning(f"Marked {failed} abandoned jobs as failed")
+        except Exception:
+            logger.exception("Abandoned job sweep failed")
+        try:
+            await asyncio.wait_for(stopping.wait(), timeout=settings.JOB_LEASE_SECONDS)
+        except asyncio.TimeoutError:
+            pass
+
+
+async def run_worker():
+    worker_id = f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+    stopping = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            # Finish the jobs in hand, then exit
+            loop.add_signal_handler(sig, stopping.set)
+        except NotImplementedError:  # Windows
+            pass
+
+    analysis_pool.start()  # before anything else starts threads
+    await create_job_indexes()
+    await browser_pool.start()
+    logger.info(f"Worker {worker_id} started with {settings.WORKER_CONCURRENCY} job slots")
+    try:
+        await asyncio.gather(
+            _sweep_loop(stopping),
+            *(_job_loop(worker_id, stopping) for _ in range(settings.WORKER_CONCURRENCY)),
+        )
+    finally:
+        await browser_pool.stop()
+        await close_http_client()
+        analysis_pool.stop()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(levelname)s %(message)s")
+    asyncio.run(run_worker())
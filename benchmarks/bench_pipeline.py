@@ -0,0 +1,225 @@
+"""
+Benchmark for the page analysis pipeline: text extraction, tech detection,
+full document parsing and the markdown/text formatters.
+
+    python -m benchmarks.bench_pipeline [--repeat 5] [--fixtures DIR] [--stages ...]
+    python -m benchmarks.bench_pipeline --compare benchmarks/results/<old>.json
+
+Runs offline against the fixture corpus (see benchmarks/fixtures.py) and
+reports, per stage, latency percentiles, throughput (pages/s, MB/s) and
+peak traced memory. Results are written as JSON keyed by git commit so two
+runs can be compared; --compare exits non-zero when a stage got slower by
+more than --threshold.
+"""
+import argparse
+import gc
+import json
+import math
+import platform
+import subprocess
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from app.utils.scraper import (
+    detect_tech, format_markdown_output, format_text_output, get_text_from_html, parse_document,
+)
+from benchmarks.fixtures import Fixture, builtin_corpus, load_fixtures
+
+RESULTS_DIR = Path(__file__).parent / "results"
+
+
+# --------------------------
+# Stages
+# --------------------------
+
+
+class Prepared:
+    """Per-fixture inputs later stages need, computed once outside the timings."""
+
+    def __init__(self, fixture: Fixture):
+        self.fixture = fixture
+        self.doc = parse_document(f"https://bench.local/{fixture.name}", fixture.html, fixture.headers)
+        self.result = self.doc.to_result()
+
+
+STAGES: Dict[str, Callable[[Prepared], object]] = {
+    "get_text_from_html": lambda p: get_text_from_html(p.fixture.html),
+    "detect_tech": lambda p: detect_tech(p.fixture.html, p.doc.scripts, p.fixture.headers),
+    "parse_document": lambda p: parse_document(p.doc.url, p.fixture.html, p.fixture.headers),
+    "format_markdown_output": lambda p: format_markdown_output([p.result]),
+    "format_text_output": lambda p: format_text_output([p.result]),
+}
+
+
+# --------------------------
+# Measurement
+# --------------------------
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    """Nearest-rank percentile of ``samples``: the smallest value with at least ``pct``% of samples at or below it."""
+    ordered = sorted(samples)
+    rank = max(0, math.ceil(pct * len(ordered) / 100) - 1)
+    return ordered[min(rank, len(ordered) - 1)]
+
+
+def _latency_summary(samples: List[float]) -> Dict[str, float]:
+    return {
+        "p50_ms": percentile(samples, 50) * 1000,
+        "p90_ms": percentile(samples, 90) * 1000,
+        "p99_ms": percentile(samples, 99) * 1000,
+        "max_ms": max(samples) * 1000,
+    }
+
+
+def _peak_memory(fn: Callable[[], object]) -> int:
+    gc.collect()
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def run_stage(stage: str, prepared: List[Prepared], repeat: int) -> Dict:
+    fn = STAGES[stage]
+    all_samples: List[float] = []
+    total_bytes = 0
+    per_fixture = {}
+    peak = 0
+
+    for p in prepared:
+        fn(p)  # warm-up: imports, regex/automaton caches, allocator
+        gc.collect()
+        samples = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            fn(p)
+            samples.append(time.perf_counter() - start)
+        fixture_peak = _peak_memory(lambda: fn(p))
+        peak = max(peak, fixture_peak)
+        all_samples.extend(samples)
+        total_bytes += p.fixture.size * repeat
+        per_fixture[p.fixture.name] = {
+            "kind": p.fixture.kind,
+            "bytes": p.fixture.size,
+            **_latency_summary(samples),
+            "peak_mem_mb": fixture_peak / 1e6,
+        }
+
+    elapsed = sum(all_samples)
+    return {
+        "runs": len(all_samples),
+        **_latency_summary(all_samples),
+        "pages_per_s": len(all_samples) / elapsed if elapsed else 0.0,
+        "mb_per_s": total_bytes / 1e6 / elapsed if elapsed else 0.0,
+        "peak_mem_mb": peak / 1e6,
+        "fixtures": per_fixture,
+    }
+
+
+# --------------------------
+# Results
+# --------------------------
+
+
+def _git(*args: str) -> Optional[str]:
+    try:
+        return subprocess.run(["git", *args], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_metadata() -> Dict:
+    commit = _git("rev-parse", "HEAD")
+    return {
+        "commit": commit or "unknown",
+        "dirty": bool(_git("status", "--porcelain", "--untracked-files=no")),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+    }
+
+
+def default_output(meta: Dict) -> Path:
+    name = meta["commit"][:12] + ("-dirty" if meta["dirty"] else "")
+    return RESULTS_DIR / f"{name}.json"
+
+
+def print_report(report: Dict):
+    print(f"commit {report['commit'][:12]}{' (dirty)' if report['dirty'] else ''}, "
+          f"{len(report['fixtures'])} fixtures, {report['repeat']} runs each")
+    print(f"{'stage':<24} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9} {'pages/s':>9} {'MB/s':>8} {'peak MB':>8}")
+    for stage, r in report["stages"].items():
+        print(f"{stage:<24} {r['p50_ms']:>9.2f} {r['p90_ms']:>9.2f} {r['p99_ms']:>9.2f} "
+              f"{r['pages_per_s']:>9.1f} {r['mb_per_s']:>8.1f} {r['peak_mem_mb']:>8.1f}")
+
+
+def compare(baseline: Dict, current: Dict, threshold: float) -> List[str]:
+    """Print per-stage changes against ``baseline``; return the stages that regressed."""
+    print(f"\nvs {baseline['commit'][:12]} ({baseline['timestamp']}):")
+    if baseline.get("fixtures") != current["fixtures"]:
+        print("Warning: the runs used different fixtures; throughput is not like-for-like")
+    print(f"{'stage':<24} {'MB/s':>18} {'change':>8} {'peak MB':>18}")
+    regressions = []
+    for stage, r in current["stages"].items():
+        old = baseline.get("stages", {}).get(stage)
+        if old is None or not old.get("mb_per_s"):
+            print(f"{stage:<24} {'(new)':>18}")
+            continue
+        change = r["mb_per_s"] / old["mb_per_s"] - 1
+        flag = ""
+        if change < -threshold:
+            flag = "  REGRESSION"
+            regressions.append(stage)
+        print(f"{stage:<24} {old['mb_per_s']:>8.1f} -> {r['mb_per_s']:>6.1f} {change:>+7.1%} "
+              f"{old['peak_mem_mb']:>8.1f} -> {r['peak_mem_mb']:>6.1f}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the page analysis pipeline on the fixture corpus")
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per fixture and stage")
+    parser.add_argument("--fixtures", metavar="DIR", help="also benchmark the saved *.html pages in DIR")
+    parser.add_argument("--no-builtin", action="store_true", help="skip the generated corpus")
+    parser.add_argument("--spa-mb", type=float, default=2.0)
+    parser.add_argument("--docs-mb", type=float, default=5.0)
+    parser.add_argument("--stages", nargs="+", choices=list(STAGES), default=list(STAGES))
+    parser.add_argument("--output", help="results file (default: benchmarks/results/<commit>.json)")
+    parser.add_argument("--compare", metavar="JSON", help="baseline results to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="allowed throughput drop before failing")
+    args = parser.parse_args()
+
+    fixtures = [] if args.no_builtin else builtin_corpus(args.spa_mb, args.docs_mb)
+    if args.fixtures:
+        fixtures += load_fixtures(args.fixtures)
+    if not fixtures:
+        raise SystemExit("No fixtures to benchmark")
+
+    prepared = [Prepared(f) for f in fixtures]
+    report = {
+        **run_metadata(),
+        "repeat": args.repeat,
+        "fixtures": {f.name: {"kind": f.kind, "bytes": f.size} for f in fixtures},
+        "stages": {stage: run_stage(stage, prepared, args.repeat) for stage in args.stages},
+    }
+    print_report(report)
+
+    output = Path(args.output) if args.output else default_output(report)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+    print(f"\nwrote {output}")
+
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text())
+        regressions = compare(baseline, report, args.threshold)
+        if regressions:
+            raise SystemExit(f"Throughput regressed beyond {args.threshold:.0%}: {', '.join(regressions)}")
+
+
+if __name__ == "__main__":
+    main()
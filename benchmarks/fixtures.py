@@ -0,0 +1,174 @@
+"""
+HTML fixture corpus for the pipeline benchmarks.
+
+The built-in corpus is generated deterministically (same seed, same bytes),
+so runs on different commits measure the same input without checking
+megabytes of HTML into git. Real pages can be added by saving them as
+``*.html`` files in a directory and passing ``--fixtures DIR``; a
+``<name>.headers.json`` file next to a page supplies its response headers.
+
+    python -m benchmarks.fixtures --write DIR   # dump the built-in corpus
+"""
+import argparse
+import json
+import random
+from pathlib import Path
+from typing import Dict, List, NamedTuple
+
+
+class Fixture(NamedTuple):
+    name: str
+    kind: str  # blog | spa | docs | saved
+    html: str
+    headers: Dict[str, str]
+
+    @property
+    def size(self) -> int:
+        return len(self.html.encode("utf-8"))
+
+
+WORDS = (
+    "the quick brown fox jumps over lazy dog lorem ipsum dolor sit amet consectetur "
+    "adipiscing elit sed do eiusmod tempor request response handler module server config"
+).split()
+
+
+def _sentence(rng: random.Random, n: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(n))
+
+
+# --------------------------
+# Generators
+# --------------------------
+
+
+def blog_page(seed: int, posts: int = 12) -> str:
+    """A small WordPress-style blog page: header, nav, a few posts, footer, analytics."""
+    rng = random.Random(seed)
+    parts = [
+        "<!doctype html><html><head><title>Blog %d</title>" % seed,
+        '<link rel="stylesheet" href="/wp-content/themes/twentyone/style.css">',
+        '<script src="https://www.googletagmanager.com/gtag/js?id=G-%d"></script>' % seed,
+        '<script src="/wp-includes/js/jquery/jquery.min.js"></script></head><body>',
+        "<header><nav>" + "".join('<a href="/category/%d">Cat %d</a>' % (i, i) for i in range(8)) + "</nav></header>",
+        "<main>",
+    ]
+    for i in range(posts):
+        parts.append(
+            '<article><h2><a href="/%d/post-%d">%s</a></h2><p>%s</p><p>%s</p>'
+            '<ul><li>%s</li><li>%s</li></ul></article>'
+            % (seed, i, _sentence(rng, 6), _sentence(rng, 80), _sentence(rng, 60), _sentence(rng, 5), _sentence(rng, 5))
+        )
+    parts.append("</main><footer><p>&copy; Blog</p><form><button>Subscribe</button></form></footer></body></html>")
+    return "".join(parts)
+
+
+def spa_shell(size: int, seed: int = 1) -> str:
+    """A client-rendered app shell: an empty root div and a large inline JS bundle."""
+    rng = random.Random(seed)
+    head = (
+        '<!doctype html><html><head><title>App</title><meta name="next-head-count" content="3">'
+        '<script src="/_next/static/chunks/framework-%d.js"></script>'
+        '<script src="https://js.stripe.com/v3/"></script></head>'
+        '<body><div id="__next"></div><script id="__NEXT_DATA__" type="application/json">' % seed
+    )
+    tail = "</script></body></html>"
+    chunks = [head]
+    length = len(head) + len(tail)
+    i = 0
+    while length < size:
+        chunk = 'window.__chunk_%d=function(e,t,n){"use strict";var r=n(%d);t.exports={id:"%s",react:r.createElement}};\n' % (
+            i, rng.randrange(10_000), _sentence(rng, 4))
+        chunks.append(chunk)
+        length += len(chunk)
+        i += 1
+    chunks.append(tail)
+    return "".join(chunks)
+
+
+def docs_page(size: int, seed: int = 1) -> str:
+    """A giant single-page documentation site: long nav, many sections, code blocks."""
+    rng = random.Random(seed)
+    parts = [
+        "<!doctype html><html><head><title>Reference</title></head><body><nav>",
+        "".join('<a href="/docs/section-%d">Section %d</a>' % (i, i) for i in range(500)),
+        "</nav><main>",
+    ]
+    length = sum(len(p) for p in parts)
+    i = 0
+    while length < size:
+        section = (
+            '<section id="s%d"><h2>Section %d</h2>%s<pre><code>def handler_%d(request):\n'
+            "    return respond(request, %d)\n</code></pre><ul>%s</ul></section>"
+            % (i, i, "".join("<p>%s</p>" % _sentence(rng, 40) for _ in range(5)), i, i,
+               "".join("<li>%s</li>" % _sentence(rng, 4) for _ in range(5)))
+        )
+        parts.append(section)
+        length += len(section)
+        i += 1
+    parts.append("</main></body></html>")
+    return "".join(parts)
+
+
+def site_page(site: int, page: int, pages: int, links: int = 6) -> str:
+    """One page of a synthetic multi-page site; links go to other pages of the same site."""
+    rng = random.Random(site * 100_003 + page)
+    nav = "".join('<a href="/s%d/p%d.html">Page %d</a>' % (site, rng.randrange(pages), i) for i in range(links))
+    body = "".join("<p>%s</p>" % _sentence(rng, 60) for _ in range(8))
+    return (
+        "<!doctype html><html><head><title>Site %d page %d</title>"
+        '<script src="/wp-includes/js/jquery/jquery.min.js"></script></head>'
+        "<body><header><nav>%s</nav></header><main><h1>%s</h1>%s</main>"
+        "<footer><p>&copy; Site %d</p></footer></body></html>"
+    ) % (site, page, nav, _sentence(rng, 5), body, site)
+
+
+BLOG_HEADERS = {"server": "nginx", "x-powered-by": "PHP/8.2", "content-type": "text/html"}
+SPA_HEADERS = {"server": "Vercel", "x-vercel-id": "fra1::abc", "content-type": "text/html"}
+DOCS_HEADERS = {"server": "cloudflare", "cf-ray": "8a1b2c3d", "content-type": "text/html"}
+
+
+def builtin_corpus(spa_mb: float = 2.0, docs_mb: float = 5.0) -> List[Fixture]:
+    corpus = [Fixture("blog-%d" % seed, "blog", blog_page(seed), BLOG_HEADERS) for seed in range(1, 4)]
+    corpus.append(Fixture("spa-shell", "spa", spa_shell(int(spa_mb * 1_000_000)), SPA_HEADERS))
+    corpus.append(Fixture("docs-giant", "docs", docs_page(int(docs_mb * 1_000_000)), DOCS_HEADERS))
+    return corpus
+
+
+# --------------------------
+# Saved fixtures
+# --------------------------
+
+
+def load_fixtures(directory: str) -> List[Fixture]:
+    fixtures = []
+    for path in sorted(Path(directory).glob("*.html")):
+        headers_path = path.with_suffix(".headers.json")
+        headers = json.loads(headers_path.read_text()) if headers_path.exists() else {}
+        html = path.read_text(encoding="utf-8", errors="replace")
+        fixtures.append(Fixture(path.stem, "saved", html, headers))
+    return fixtures
+
+
+def write_fixtures(fixtures: List[Fixture], directory: str):
+    out = Path(directory)
+    out.mkdir(parents=True, exist_ok=True)
+    for fixture in fixtures:
+        (out / f"{fixture.name}.html").write_text(fixture.html, encoding="utf-8")
+        (out / f"{fixture.name}.headers.json").write_text(json.dumps(fixture.headers, indent=2))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write the built-in benchmark corpus to disk")
+    parser.add_argument("--write", metavar="DIR", required=True)
+    parser.add_argument("--spa-mb", type=float, default=2.0)
+    parser.add_argument("--docs-mb", type=float, default=5.0)
+    args = parser.parse_args()
+    corpus = builtin_corpus(args.spa_mb, args.docs_mb)
+    write_fixtures(corpus, args.write)
+    for fixture in corpus:
+        print(f"{fixture.name:<12} {fixture.size:>10} bytes")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,388 @@
+"""
+End-to-end load test of the /api/scrapper endpoints.
+
+    python -m benchmarks.loadtest [--concurrency 1 4 16 32] [--duration 15] [--endpoints scrape crawl batch]
+    python -m benchmarks.loadtest --mongo-uri mongodb://localhost:27017
+
+Runs the real FastAPI app under uvicorn in this process, against an
+in-memory Mongo stand-in (mongomock-motor; or a real server with
+--mongo-uri, database ``scrapper_loadtest`` unless DATABASE_NAME is set)
+and a local fixture web server that serves synthetic multi-page sites.
+Every request goes through the whole path: API-key lookup, quota update,
+call log, fetch, parsing and formatting. Pages are fetched with
+mode=static because Chromium may not be installed.
+
+For each concurrency level it reports per-endpoint latency percentiles and
+a histogram, throughput and errors, then the highest throughput that stayed
+within --slo-ms (p99) and --max-error-rate. Per-host politeness limits are
+lifted so the fixture server doesn't become the bottleneck; pass --polite
+to keep the configured ones.
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+import httpx
+
+from benchmarks.fixtures import site_page
+
+LOADTEST_PLAN = 99  # plan id given to the load-test users, with an effectively unlimited quota
+# Upper bounds (ms) of the latency histogram buckets; the last one is open
+HISTOGRAM_BOUNDS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+# --------------------------
+# Fixture web server
+# --------------------------
+
+
+class SiteHandler(BaseHTTPRequestHandler):
+    """Serves /s<site>/p<page>.html from the generator, plus an allow-all robots.txt."""
+
+    pages = 50
+    latency = 0.0
+    _cache: Dict[str, bytes] = {}
+
+    def do_GET(self):
+        if self.latency:
+            time.sleep(self.latency)
+        if self.path == "/robots.txt":
+            return self._send(b"User-agent: *\nAllow: /\n", "text/plain")
+        body = self._page(self.path)
+        if body is None:
+            return self._send(b"not found", "text/plain", 404)
+        self._send(body, "text/html; charset=utf-8")
+
+    def _page(self, path: str) -> Optional[bytes]:
+        body = self._cache.get(path)
+        if body is None:
+            try:
+                site, page = path.strip("/").removesuffix(".html").split("/")
+                site, page = int(site[1:]), int(page[1:])
+            except ValueError:
+                return None
+            if page >= self.pages:
+                return None
+            body = self._cache[path] = site_page(site, page, self.pages).encode("utf-8")
+        return body
+
+    def _send(self, body: bytes, content_type: str, status: int = 200):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_site_server(pages: int, latency_ms: float) -> Tuple[ThreadingHTTPServer, str]:
+    handler = type("LoadTestSiteHandler", (SiteHandler,), {"pages": pages, "latency": latency_ms / 1000, "_cache": {}})
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+# --------------------------
+# App under test
+# --------------------------
+
+
+def _configure_env(args):
+    """Settings are read when ``app`` is imported, so this runs first."""
+    if args.mongo_uri:
+        os.environ["MONGO_URI"] = args.mongo_uri
+        os.environ.setdefault("DATABASE_NAME", "scrapper_loadtest")
+    else:
+        os.environ.setdefault("MONGO_URI", "mongodb://localhost:27017")
+        os.environ.setdefault("DATABASE_NAME", "scrapper_loadtest")
+    os.environ.setdefault("JWT_SECRET", "loadtest")
+    os.environ.setdefault("ACCESS_TOKEN_EXPIRE_MINUTES", "60")
+    if not args.polite:
+        os.environ["HOST_RATE"] = "0"
+        os.environ["HOST_MAX_IN_FLIGHT"] = "100000"
+
+
+def _use_mock_db():
+    try:
+        from mongomock_motor import AsyncMongoMockClient
+    except ImportError:
+        raise SystemExit("mongomock-motor is not installed: pip install mongomock-motor, or pass --mongo-uri")
+    import app.database
+
+    mock = AsyncMongoMockClient()[os.environ["DATABASE_NAME"]]
+    # Modules hold their own reference from ``from ..database import db``
+    real = app.database.db
+    for name, module in list(sys.modules.items()):
+        if name.startswith("app") and getattr(module, "db", None) is real:
+            module.db = mock
+
+
+def load_app(args, users: int):
+    """Import the app configured for the load test; returns (app, API keys)."""
+    _configure_env(args)
+    import app.main
+    from app.routes import api
+
+    if not args.mongo_uri:
+        _use_mock_db()
+    api.PLANS[LOADTEST_PLAN] = 10 ** 9
+    api.CACHE_TTLS[LOADTEST_PLAN] = api.CACHE_TTLS[2]
+    keys = [f"loadtest-{i}" for i in range(users)]
+
+    async def seed_users():
+        db = api.db
+        for key in keys:
+            await db.users.update_one(
+                {"username": key}, {"$set": {"secret_token": key, "plan": LOADTEST_PLAN}}, upsert=True,
+            )
+            user = await db.users.find_one({"username": key})
+            await db.usage.delete_many({"user_id": user["_id"]})
+
+    app.main.app.router.on_startup.append(seed_users)
+    return app.main.app, keys
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_app_server(app) -> Tuple[object, str]:
+    import uvicorn
+
+    port = _free_port()
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning", access_log=False))
+    # Its own thread and event loop, so the load generator doesn't compete with the app
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        if not thread.is_alive():
+            raise SystemExit("API server failed to start")
+        time.sleep(0.05)
+    server.thread = thread
+    return server, f"http://127.0.0.1:{port}"
+
+
+def stop_app_server(server):
+    server.should_exit = True
+    server.thread.join(timeout=30)
+
+
+# --------------------------
+# Load generator
+# --------------------------
+
+
+class Target:
+    """
+    Hands out fixture URLs round-robin over every site and page, or over a
+    small hot set that cached requests keep hitting.
+    """
+
+    HOT_URLS = 10
+
+    def __init__(self, base: str, sites: int, pages: int):
+        self.urls = [f"{base}/s{s}/p{p}.html" for p in range(pages) for s in range(sites)]
+        self._next = 0
+
+    def take(self, n: int = 1, hot: bool = False) -> List[str]:
+        pool = self.urls[:self.HOT_URLS] if hot else self.urls
+        out = []
+        for _ in range(n):
+            out.append(pool[self._next % len(pool)])
+            self._next += 1
+        return out
+
+
+def _scrape(cache: bool, max_pages: int = 1):
+    def build(client: httpx.AsyncClient, target: Target, key: str):
+        params = {"url": target.take(hot=cache)[0], "mode": "static", "cache": str(cache).lower(), "max_pages": max_pages}
+        return client.get("/api/scrapper", params=params, headers={"x-api-key": key})
+    return build
+
+
+def _batch(size: int):
+    def build(client: httpx.AsyncClient, target: Target, key: str):
+        body = {"urls": target.take(size), "mode": "static", "cache": False}
+        return client.post("/api/scrapper/batch", json=body, headers={"x-api-key": key})
+    return build
+
+
+ENDPOINTS: Dict[str, Callable] = {
+    "scrape": _scrape(cache=False),
+    "scrape-cached": _scrape(cache=True),
+    "crawl": _scrape(cache=False, max_pages=5),
+    "batch": _batch(5),
+}
+
+
+async def run_level(base: str, target: Target, keys: List[str], endpoints: List[str],
+                    concurrency: int, duration: float, timeout: float) -> Dict[str, List[Tuple[float, int]]]:
+    """``concurrency`` clients send back to back for ``duration`` seconds; returns (seconds, status) per endpoint."""
+    samples: Dict[str, List[Tuple[float, int]]] = {name: [] for name in endpoints}
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base, timeout=timeout, limits=limits) as client:
+        deadline = time.perf_counter() + duration
+
+        async def worker(n: int):
+            i = n
+            while time.perf_counter() < deadline:
+                name = endpoints[i % len(endpoints)]
+                key = keys[i % len(keys)]
+                i += 1
+                start = time.perf_counter()
+                try:
+                    response = await ENDPOINTS[name](client, target, key)
+                    status = response.status_code
+                except httpx.HTTPError:
+                    status = 0  # timeout or connection error
+                samples[name].append((time.perf_counter() - start, status))
+
+        await asyncio.gather(*(worker(n) for n in range(concurrency)))
+    return samples
+
+
+def summarize(samples: List[Tuple[float, int]], duration: float) -> Dict:
+    # bench_pipeline imports the app, so it can't be imported before load_app()
+    from benchmarks.bench_pipeline import percentile
+
+    if not samples:
+        return {"requests": 0, "rps": 0.0, "errors": 0, "error_rate": 0.0}
+    latencies = [s for s, _ in samples]
+    statuses: Dict[str, int] = {}
+    for _, status in samples:
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+    errors = sum(1 for _, status in samples if not 200 <= status < 300)
+    histogram = [0] * (len(HISTOGRAM_BOUNDS) + 1)
+    for seconds in latencies:
+        ms = seconds * 1000
+        histogram[next((i for i, bound in enumerate(HISTOGRAM_BOUNDS) if ms <= bound), len(HISTOGRAM_BOUNDS))] += 1
+    return {
+        "requests": len(samples),
+        "rps": len(samples) / duration,
+        "errors": errors,
+        "error_rate": errors / len(samples),
+        "statuses": statuses,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p90_ms": percentile(latencies, 90) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "max_ms": max(latencies) * 1000,
+        "histogram": histogram,
+    }
+
+
+# --------------------------
+# Report
+# --------------------------
+
+
+def _bucket_label(i: int) -> str:
+    if i == len(HISTOGRAM_BOUNDS):
+        return f">{HISTOGRAM_BOUNDS[-1]} ms"
+    return f"<={HISTOGRAM_BOUNDS[i]} ms"
+
+
+def print_level(concurrency: int, level: Dict):
+    print(f"\nconcurrency {concurrency}: {level['total']['requests']} requests, "
+          f"{level['total']['rps']:.1f} req/s, {level['total']['errors']} errors")
+    print(f"{'endpoint':<14} {'reqs':>6} {'req/s':>7} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8} {'max ms':>8} {'errors':>7}")
+    for name, r in level["endpoints"].items():
+        if not r["requests"]:
+            print(f"{name:<14} {0:>6}")
+            continue
+        print(f"{name:<14} {r['requests']:>6} {r['rps']:>7.1f} {r['p50_ms']:>8.1f} {r['p90_ms']:>8.1f} "
+              f"{r['p99_ms']:>8.1f} {r['max_ms']:>8.1f} {r['errors']:>7}")
+    for name, r in level["endpoints"].items():
+        if not r["requests"]:
+            continue
+        print(f"  {name} latency histogram")
+        widest = max(r["histogram"])
+        for i, count in enumerate(r["histogram"]):
+            if count:
+                print(f"    {_bucket_label(i):>11} {count:>6} {'#' * max(1, round(40 * count / widest))}")
+
+
+def sustainable(levels: Dict[int, Dict], slo_ms: float, max_error_rate: float) -> Optional[Tuple[int, float]]:
+    """(concurrency, req/s) of the highest-throughput level within the SLO, if any."""
+    passing = [
+        (c, level["total"]["rps"]) for c, level in levels.items()
+        if level["total"]["requests"]
+        and level["total"]["p99_ms"] <= slo_ms
+        and level["total"]["error_rate"] <= max_error_rate
+    ]
+    return max(passing, key=lambda p: p[1]) if passing else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the /api/scrapper endpoints against local stand-ins")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16, 32], help="client levels to run, in order")
+    parser.add_argument("--duration", type=float, default=15.0, help="seconds per concurrency level")
+    parser.add_argument("--warmup", type=float, default=3.0, help="unrecorded seconds before the first level")
+    parser.add_argument("--endpoints", nargs="+", choices=list(ENDPOINTS), default=["scrape", "crawl", "batch"])
+    parser.add_argument("--users", type=int, default=4, help="API keys the requests are spread over")
+    parser.add_argument("--sites", type=int, default=10)
+    parser.add_argument("--site-pages", type=int, default=50, help="pages per fixture site")
+    parser.add_argument("--site-latency-ms", type=float, default=0.0, help="delay the fixture server adds per page")
+    parser.add_argument("--timeout", type=float, default=60.0, help="client timeout per request (seconds)")
+    parser.add_argument("--slo-ms", type=float, default=2000.0, help="p99 a level must stay under to count as sustainable")
+    parser.add_argument("--max-error-rate", type=float, default=0.01)
+    parser.add_argument("--mongo-uri", help="use this Mongo server instead of the in-memory stand-in")
+    parser.add_argument("--polite", action="store_true", help="keep the configured per-host rate limits")
+    parser.add_argument("--output", help="also write the results as JSON here")
+    args = parser.parse_args()
+
+    site_server, site_base = start_site_server(args.site_pages, args.site_latency_ms)
+    app, keys = load_app(args, max(1, args.users))
+    api_server, api_base = start_app_server(app)
+    target = Target(site_base, args.sites, args.site_pages)
+    print(f"API at {api_base}, fixture sites at {site_base}, "
+          f"{'Mongo ' + args.mongo_uri if args.mongo_uri else 'in-memory Mongo'}")
+
+    levels: Dict[int, Dict] = {}
+    try:
+        if args.warmup > 0:
+            asyncio.run(run_level(api_base, target, keys, args.endpoints, max(args.concurrency), args.warmup, args.timeout))
+        for concurrency in args.concurrency:
+            samples = asyncio.run(run_level(api_base, target, keys, args.endpoints, concurrency, args.duration, args.timeout))
+            levels[concurrency] = {
+                "endpoints": {name: summarize(s, args.duration) for name, s in samples.items()},
+                "total": summarize([x for s in samples.values() for x in s], args.duration),
+            }
+            print_level(concurrency, levels[concurrency])
+    finally:
+        stop_app_server(api_server)
+        site_server.shutdown()
+
+    best = sustainable(levels, args.slo_ms, args.max_error_rate)
+    if best:
+        print(f"\nmax sustainable: {best[1]:.1f} req/s at concurrency {best[0]} "
+              f"(p99 <= {args.slo_ms:.0f} ms, errors <= {args.max_error_rate:.0%})")
+    else:
+        print(f"\nno level stayed within p99 <= {args.slo_ms:.0f} ms and errors <= {args.max_error_rate:.0%}")
+
+    if args.output:
+        output = Path(args.output)
+        output.parent.mkdir(parents=True, exist_ok=True)
+        output.write_text(json.dumps({
+            "args": vars(args),
+            "histogram_bounds_ms": HISTOGRAM_BOUNDS,
+            "levels": levels,
+            "max_sustainable": {"concurrency": best[0], "rps": best[1]} if best else None,
+        }, indent=2))
+        print(f"wrote {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,20 @@
+from benchmarks.bench_pipeline import percentile
+
+
+def test_percentile_nearest_rank():
+    samples = [float(i) for i in range(10, 0, -1)]  # 1..10, unsorted
+    assert percentile(samples, 50) == 5.0
+    assert percentile(samples, 70) == 7.0
+    assert percentile(samples, 90) == 9.0
+    assert percentile(samples, 91) == 10.0
+    assert percentile(samples, 99) == 10.0
+    assert percentile(samples, 100) == 10.0
+    assert percentile(samples, 0) == 1.0
+
+
+def test_percentile_small_samples():
+    assert percentile([3.0], 50) == 3.0
+    assert percentile([1.0, 2.0], 50) == 1.0
+    assert percentile([1.0, 2.0], 51) == 2.0
+    assert percentile([1.0, 2.0, 3.0, 4.0], 25) == 1.0
+    assert percentile([1.0, 2.0, 3.0, 4.0], 75) == 3.0
@@ -0,0 +1,8 @@
+import os
+
+# Settings are read when app.config is imported; the tests never reach a real
+# server, so placeholders are enough when there is no .env
+os.environ.setdefault("MONGO_URI", "mongodb://localhost:27017")
+os.environ.setdefault("DATABASE_NAME", "scrapper_test")
+os.environ.setdefault("JWT_SECRET", "test-secret")
+os.environ.setdefault("ACCESS_TOKEN_EXPIRE_MINUTES", "5")
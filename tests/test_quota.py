@@ -0,0 +1,146 @@
+import asyncio
+from datetime import date, timedelta
+
+import pytest
+from bson import ObjectId
+from fastapi import HTTPException
+from pymongo.errors import DuplicateKeyError
+
+mongomock_motor = pytest.importorskip("mongomock_motor")
+
+from app.routes import api  # noqa: E402
+
+
+@pytest.fixture
+def db(monkeypatch):
+    mock = mongomock_motor.AsyncMongoMockClient()["scrapper_test"]
+    asyncio.run(mock.usage.create_index("user_id", unique=True))
+    monkeypatch.setattr(api, "db", mock)
+    return mock
+
+
+def _user(plan=0):
+    return {"_id": ObjectId(), "plan": plan}
+
+
+def _consume(user, units=1):
+    return asyncio.run(api._consume_quota(user, units))
+
+
+def _usage(db, user):
+    return asyncio.run(db.usage.find_one({"user_id": user["_id"]}))
+
+
+def test_first_call_creates_usage(db):
+    user = _user()
+    usage, plan_limit = _consume(user)
+    assert plan_limit == api.PLANS[0]
+    assert usage["calls_made_month"] == 1
+    assert usage["calls_today"] == 1
+    assert usage["last_day_reset"] == date.today().isoformat()
+    assert usage["last_month_reset"] == date.today().isoformat()
+
+
+def test_limit_is_exact(db):
+    user = _user(plan=0)
+    for _ in range(api.PLANS[0]):
+        _consume(user)
+    with pytest.raises(HTTPException) as exc:
+        _consume(user)
+    assert exc.value.status_code == 403
+    # A refused call is not charged
+    assert _usage(db, user)["calls_made_month"] == api.PLANS[0]
+
+
+def test_concurrent_calls_never_overshoot(db):
+    user = _user(plan=0)
+
+    async def call():
+        try:
+            await api._consume_quota(user)
+            return True
+        except HTTPException:
+            return False
+
+    async def burst():
+        return await asyncio.gather(*(call() for _ in range(25)))
+
+    assert sum(asyncio.run(burst())) == api.PLANS[0]
+    assert _usage(db, user)["calls_made_month"] == api.PLANS[0]
+
+
+def test_multi_unit_charge_is_all_or_nothing(db):
+    user = _user(plan=0)
+    usage, _ = _consume(user, 7)
+    assert usage["calls_made_month"] == 7
+    with pytest.raises(HTTPException):
+        _consume(user, 4)
+    assert _usage(db, user)["calls_made_month"] == 7
+    usage, _ = _consume(user, 3)
+    assert usage["calls_made_month"] == 10
+
+
+def test_zero_units_never_raises(db):
+    user = _user(plan=0)
+    _consume(user, api.PLANS[0])
+    usage, plan_limit = _consume(user, 0)
+    assert usage["calls_made_month"] == plan_limit
+
+
+def test_monthly_reset_after_30_days(db):
+    user = _user(plan=0)
+    _consume(user, api.PLANS[0])
+    stale = (date.today() - timedelta(days=31)).isoformat()
+    yesterday = (date.today() - timedelta(days=1)).isoformat()
+    asyncio.run(db.usage.update_one(
+        {"user_id": user["_id"]}, {"$set": {"last_month_reset": stale, "last_day_reset": yesterday}},
+    ))
+    usage, _ = _consume(user, 2)
+    assert usage["calls_made_month"] == 2
+    assert usage["calls_today"] == 2
+    assert usage["last_month_reset"] == date.today().isoformat()
+
+
+def test_daily_reset_keeps_monthly_count(db):
+    user = _user(plan=0)
+    _consume(user, 5)
+    asyncio.run(db.usage.update_one(
+        {"user_id": user["_id"]},
+        {"$set": {
+            "last_day_reset": (date.today() - timedelta(days=1)).isoformat(),
+            "last_month_reset": (date.today() - timedelta(days=29)).isoformat(),
+        }},
+    ))
+    usage, _ = _consume(user)
+    assert usage["calls_made_month"] == 6
+    assert usage["calls_today"] == 1
+
+
+def test_legacy_document_without_reset_fields(db):
+    user = _user(plan=1)
+    asyncio.run(db.usage.insert_one({"user_id": user["_id"], "calls_made_month": 5}))
+    usage, plan_limit = _consume(user)
+    assert plan_limit == api.PLANS[1]
+    assert usage["calls_made_month"] == 6
+    assert usage["calls_today"] == 1
+
+
+def test_upsert_race_retries_without_upsert(db, monkeypatch):
+    user = _user()
+    _consume(user)  # the document the other racer created
+    calls = []
+
+    class RacingUsage:
+        async def find_one_and_update(self, *args, **kwargs):
+            calls.append(kwargs.get("upsert", False))
+            if kwargs.get("upsert"):
+                raise DuplicateKeyError("E11000 duplicate key error")
+            return await db.usage.find_one_and_update(*args, **kwargs)
+
+    class RacingDb:
+        usage = RacingUsage()
+
+    monkeypatch.setattr(api, "db", RacingDb())
+    usage, _ = _consume(user)
+    assert calls == [True, False]
+    assert usage["calls_made_month"] == 2
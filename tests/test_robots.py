@@ -0,0 +1,88 @@
+from app.config import settings
+from app.scrapperUtils.robots import RobotsRules, _parse_crawl_delay
+
+
+def _delay(text, agent="ScrapperBot"):
+    return _parse_crawl_delay(text.strip().splitlines(), agent)
+
+
+def test_no_crawl_delay():
+    assert _delay("User-agent: *\nDisallow: /private") is None
+
+
+def test_wildcard_group():
+    assert _delay("User-agent: *\nCrawl-delay: 3") == 3.0
+
+
+def test_fractional_delay():
+    # robotparser drops these, which is why the parser exists
+    assert _delay("User-agent: *\nCrawl-delay: 0.5") == 0.5
+
+
+def test_named_agent_beats_wildcard():
+    text = """
+User-agent: *
+Crawl-delay: 10
+
+User-agent: ScrapperBot
+Crawl-delay: 2
+"""
+    assert _delay(text) == 2.0
+    assert _delay(text, agent="OtherBot") == 10.0
+
+
+def test_agent_match_is_case_insensitive_substring():
+    assert _delay("User-agent: scrapperbot\nCrawl-delay: 4", agent="ScrapperBot/1.0") == 4.0
+
+
+def test_consecutive_user_agents_share_a_group():
+    text = """
+User-agent: OtherBot
+User-agent: ScrapperBot
+Disallow: /tmp
+Crawl-delay: 5
+"""
+    assert _delay(text) == 5.0
+
+
+def test_rule_line_ends_the_agent_list():
+    text = """
+User-agent: OtherBot
+Crawl-delay: 7
+User-agent: ScrapperBot
+Crawl-delay: 1
+"""
+    assert _delay(text) == 1.0
+    assert _delay(text, agent="OtherBot") == 7.0
+
+
+def test_first_value_wins_within_a_group():
+    assert _delay("User-agent: *\nCrawl-delay: 2\nCrawl-delay: 9") == 2.0
+
+
+def test_comments_and_whitespace():
+    text = """
+# polite please
+User-agent: *   # everyone
+  Crawl-delay :  1.5  # seconds
+"""
+    assert _delay(text) == 1.5
+
+
+def test_invalid_value_is_ignored():
+    assert _delay("User-agent: *\nCrawl-delay: soon\nCrawl-delay: 2") == 2.0
+
+
+def test_delay_outside_any_group_is_ignored():
+    assert _delay("Crawl-delay: 5\nUser-agent: *\nDisallow:") is None
+
+
+def test_rules_clamp_to_max(monkeypatch):
+    monkeypatch.setattr(settings, "ROBOTS_MAX_CRAWL_DELAY", 10.0)
+    rules = RobotsRules("https://example.com", ["User-agent: *", "Crawl-delay: 120"])
+    assert rules.crawl_delay == 10.0
+
+
+def test_rules_fall_back_to_request_rate():
+    rules = RobotsRules("https://example.com", ["User-agent: *", "Request-rate: 1/4"])
+    assert rules.crawl_delay == 4.0